@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+"""
+Archive of the articles behind each run
+Every run is appended as one gzip-compressed JSONL file in a per-day
+directory (archive/2025-11-01/run-120000.jsonl.gz), one article per line,
+so past days can be re-analyzed offline with reanalyze.py. Days older than
+the retention period are dropped by prune().
+"""
+
+import gzip
+import json
+import os
+import shutil
+from datetime import datetime, timedelta
+
+# Article fields kept in the archive
+ARCHIVE_FIELDS = ('title', 'source', 'date', 'url')
+
+class ArticleArchive:
+    """Date-partitioned run files under `directory`, named by run time"""
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    def write_run(self, country_articles, timeframes, run_time=None):
+        """Store one run's {country_name: articles}; returns the file written"""
+        run_time = run_time or datetime.now()
+        day_dir = os.path.join(self.directory, run_time.strftime('%Y-%m-%d'))
+        os.makedirs(day_dir, exist_ok=True)
+        path = os.path.join(day_dir, f"run-{run_time.strftime('%H%M%S')}.jsonl.gz")
+
+        tmp_path = path + '.tmp'
+        with gzip.open(tmp_path, 'wt', encoding='utf-8') as f:
+            for country_name, articles in country_articles.items():
+                timeframe = timeframes.get(country_name, '')
+                for article in articles:
+                    record = {'country': country_name, 'timeframe': timeframe}
+                    record.update({field: article.get(field, '') for field in ARCHIVE_FIELDS})
+                    f.write(json.dumps(record, ensure_ascii=False) + '\n')
+        os.replace(tmp_path, path)
+        return path
+
+    def days(self):
+        """Archived days ('YYYY-MM-DD'), oldest first"""
+        if not os.path.isdir(self.directory):
+            return []
+        return sorted(name for name in os.listdir(self.directory)
+                      if os.path.isdir(os.path.join(self.directory, name)))
+
+    def prune(self, keep_days, today=None):
+        """Delete day directories more than keep_days before today; returns the days removed"""
+        cutoff = ((today or datetime.now()) - timedelta(days=keep_days)).strftime('%Y-%m-%d')
+        expired = [day for day in self.days() if day < cutoff]
+        for day in expired:
+            shutil.rmtree(os.path.join(self.directory, day))
+        return expired
+
+    def runs(self, day):
+        """Run files of one day, oldest first"""
+        day_dir = os.path.join(self.directory, day)
+        return sorted(os.path.join(day_dir, name) for name in os.listdir(day_dir) if name.endswith('.jsonl.gz'))
+
+    def read_run(self, path):
+        """Load a run file back into ({country_name: articles}, {country_name: timeframe})"""
+        country_articles = {}
+        timeframes = {}
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            for line in f:
+                record = json.loads(line)
+                country_name = record.pop('country')
+                timeframes[country_name] = record.pop('timeframe')
+                country_articles.setdefault(country_name, []).append(record)
+        return country_articles, timeframes
+
+    @staticmethod
+    def run_time(path):
+        """Run time encoded in a run file's path"""
+        day = os.path.basename(os.path.dirname(path))
+        clock = os.path.basename(path)[len('run-'):-len('.jsonl.gz')]
+        return datetime.strptime(f"{day} {clock}", '%Y-%m-%d %H%M%S')
@@ -0,0 +1,378 @@
+# -*- coding: utf-8 -*-
+"""
+Pipeline benchmark on recorded GDELT responses
+Serves a recorded fixture from a local fake GDELT DOC API and runs the real
+pipeline against it stage by stage (fetch, dedupe, tokenize, cross-country
+dedupe, rolling stats, score, trends, write), at 1x, 10x and 100x today's
+headline volume. Extra volume is synthetic: deep-collection windows return
+variants of each country's recorded headlines with words swapped for others
+from the same country's headlines. The server stays in this process and each
+scale runs in a fresh one, so peak RSS is the pipeline's own; on Linux the
+high-water mark is reset before every stage, so each stage reports its own peak.
+
+Results go to benchmarks/results/<time>-<commit>.json; --compare prints the
+change against an earlier file.
+
+Usage:
+    python benchmark.py                          # 1x, 10x, 100x
+    python benchmark.py --scales 1 10            # Chosen scales
+    python benchmark.py --compare benchmarks/results/OLD.json
+    python benchmark.py record                   # Record today's responses from GDELT
+    python benchmark.py record --from-headlines  # Fixture from the published headlines/ shards
+"""
+
+import argparse
+import contextlib
+import gzip
+import io
+import json
+import os
+import random
+import re
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from itertools import zip_longest
+from multiprocessing import get_context
+from urllib.parse import urlparse, parse_qs
+
+FIXTURE_FILE = os.path.join('benchmarks', 'gdelt_fixture.json.gz')
+RESULTS_DIR = os.path.join('benchmarks', 'results')
+DEFAULT_SCALES = (1, 10, 100)
+SWAP_PROBABILITY = 0.5   # Share of a recorded headline's words replaced in a synthetic variant
+
+# ---------------------------------------------------------------- fixtures
+
+def load_fixture(path=FIXTURE_FILE):
+    """{'recorded_at', 'source', 'responses': {country_code: [raw GDELT article, ...]}}"""
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        return json.load(f)
+
+def save_fixture(responses, source, path=FIXTURE_FILE):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fixture = {
+        'recorded_at': datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ'),
+        'source': source,
+        'responses': responses,
+    }
+    with gzip.open(path, 'wt', encoding='utf-8') as f:
+        json.dump(fixture, f, ensure_ascii=False, separators=(',', ':'))
+    total = sum(len(articles) for articles in responses.values())
+    print(f"Fixture saved to: {path} ({total} articles, {len(responses)} countries)")
+
+def record_from_gdelt():
+    """Today's 24h response for every country, as GDELT returned it"""
+    import worldsmood_gdelt as wm
+    responses = {}
+    for country_name, country_code in wm.COUNTRIES.items():
+        raw_articles, cached, error = wm.fetch_gdelt_raw(wm.build_gdelt_params(country_code, '24h'))
+        responses[country_code] = raw_articles or []
+        print(f"  {country_name}: {len(responses[country_code])} articles{f' ({error})' if error else ''}")
+    return responses
+
+def record_from_headlines(directory='headlines'):
+    """A fixture from the published headline shards (real headlines; URLs and dates made up)"""
+    import worldsmood_gdelt as wm
+    with open(os.path.join(directory, 'index.json'), 'r', encoding='utf-8') as f:
+        index = json.load(f)
+    responses = {}
+    for country_name, entry in index.items():
+        code = wm.COUNTRIES[country_name]
+        with open(os.path.join(directory, entry['shard']), 'r', encoding='utf-8') as f:
+            shard = json.load(f)
+        responses[code] = [
+            {
+                'url': f"https://{code.lower()}.bench.invalid/{idx}",
+                'title': title,
+                'seendate': '20251101T120000Z',
+                'domain': f"{code.lower()}.bench.invalid",
+                'sourcecountry': country_name,
+            }
+            for idx, title in enumerate(shard['with_word'] + shard['without_word'])
+        ]
+    return responses
+
+# ------------------------------------------------------------- fake server
+
+class FixtureServer:
+    """
+    Local stand-in for the GDELT DOC API. A relative-timespan query returns
+    the country's recorded articles; each new startdatetime window for a
+    country returns the next synthetic variant of them, up to `scale - 1`
+    variants, then nothing. OR-combined batch queries interleave countries.
+    """
+
+    def __init__(self, responses, scale):
+        self.responses = responses
+        self.scale = scale
+        self.windows = {}  # (country_code, startdatetime) -> variant number
+        self.window_counts = {}  # country_code -> windows seen
+        self.lock = threading.Lock()
+        self.word_pools = {
+            code: [word for article in articles for word in article['title'].split()]
+            for code, articles in responses.items()
+        }
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                body = json.dumps(server.respond(parse_qs(urlparse(self.path).query))).encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}/api/v2/doc/doc"
+
+    def variant(self, code, number):
+        """Synthetic variant `number` (>= 1) of a country's recorded articles (deterministic)"""
+        rng = random.Random(f"{code}:{number}")
+        pool = self.word_pools[code]
+        articles = []
+        for article in self.responses[code]:
+            words = [rng.choice(pool) if rng.random() < SWAP_PROBABILITY else word
+                     for word in article['title'].split()]
+            articles.append(dict(article, title=' '.join(words), url=f"{article['url']}/{number}"))
+        return articles
+
+    def country_articles(self, code, query):
+        if code not in self.responses:
+            return []
+        if 'startdatetime' not in query:
+            return self.responses[code]
+        key = (code, query['startdatetime'][0])
+        with self.lock:
+            if key not in self.windows:
+                self.window_counts[code] = self.window_counts.get(code, 0) + 1
+                self.windows[key] = self.window_counts[code]
+            number = self.windows[key]
+        return self.variant(code, number) if number < self.scale else []
+
+    def respond(self, query):
+        codes = re.findall(r'sourcecountry:(\w+)', query.get('query', [''])[0])
+        limit = int(query.get('maxrecords', ['250'])[0])
+        lists = [self.country_articles(code, query) for code in codes]
+        articles = [article for group in zip_longest(*lists) for article in group if article][:limit]
+        return {'articles': articles} if articles else {}
+
+    def __enter__(self):
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+# ------------------------------------------------------------------ stages
+
+def reset_peak_rss():
+    """Restart the kernel's RSS high-water mark at the current RSS (Linux); False where unsupported"""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+def peak_rss_mb():
+    """
+    Peak resident set size since the last reset_peak_rss() (Linux VmHWM),
+    else the process peak so far (ru_maxrss, KB on Linux, bytes on macOS)
+    """
+    try:
+        with open('/proc/self/status', 'r') as f:
+            return round(int(re.search(r'VmHWM:\s+(\d+)', f.read()).group(1)) / 1024, 1)
+    except (OSError, AttributeError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+def run_scale(api_url, scale):
+    """Run every stage once at `scale` against the fake API at `api_url`; returns {stage: metrics}"""
+    import worldsmood_gdelt as wm
+    from generate_globe_data import generate_globe_data
+    from rate_limit import RequestThrottle
+    from rolling_stats import RollingWordStats
+    from trend_detector import SpikeDetector
+
+    wm.RESPONSE_CACHE = None
+    wm.GDELT_THROTTLE = RequestThrottle(1e6, 1e6)
+    wm.DEEP_COLLECTION = scale > 1
+    wm.DEEP_WINDOWS = max(scale - 1, 1)
+    wm.DEEP_SATURATION = 0  # Fetch every window
+    metrics = {}
+    state = {}
+    work_dir = tempfile.mkdtemp(prefix='worldsmood-bench-')
+
+    def measure(stage, function, count_articles):
+        # Each stage's peak is its own where the high-water mark can be reset,
+        # so a regression in a late stage isn't hidden behind fetch's peak
+        per_stage = reset_peak_rss()
+        started = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            function()
+        seconds = time.perf_counter() - started
+        articles = count_articles()
+        metrics[stage] = {
+            'seconds': round(seconds, 4),
+            'articles': articles,
+            'articles_per_second': round(articles / seconds, 1) if seconds > 0 else None,
+            'peak_rss_mb': peak_rss_mb(),
+            'peak_rss_scope': 'stage' if per_stage else 'process',
+        }
+
+    def total_articles():
+        return sum(len(articles) for articles in state['articles'].values())
+
+    def fetch():
+        state['articles'], state['timeframes'], _ = wm.collect_news(wm.COUNTRIES)
+
+    def dedupe():
+        state['articles'] = {country_name: wm.collapse_near_duplicates(articles)
+                             for country_name, articles in state['articles'].items()}
+
+    def tokenize():
+        state['corpus'] = wm.build_corpus(state['articles'])
+
+    def cross_dedupe():
+        duplicate_counts, _ = wm.cross_country_duplicate_counts(state['corpus'], state['articles'])
+        state['global_counts'] = state['corpus'].global_counts() - duplicate_counts
+
+    def rolling():
+        # An empty state, run as of the newest fixture seendate: every article
+        # falls inside the window and is new (the most work a run can do)
+        newest = max(article['date'] for articles in state['articles'].values() for article in articles)
+        rolling_stats = RollingWordStats(os.path.join(work_dir, 'rolling_state'), wm.ROLLING_WINDOW_DAYS,
+                                         sketch_width=wm.SKETCH_WIDTH if wm.USE_SKETCH_COUNTS else 0,
+                                         sketch_depth=wm.SKETCH_DEPTH, heavy_hitters=wm.HEAVY_HITTERS_K)
+        state['new_articles'] = rolling_stats.add_run(state['articles'], state['corpus'].headline_words,
+                                                      run_time=datetime.strptime(newest[:8], '%Y%m%d'))
+        rolling_stats.save()
+        if not state['new_articles']:
+            raise RuntimeError("Rolling stats counted no articles; the fixture seendates are outside the window")
+
+    def score():
+        state['results'], state['headlines'] = wm.analyze_countries(
+            state['articles'], state['timeframes'], state['corpus'], verbose=False,
+            global_counts=state['global_counts'])
+
+    def trends():
+        detector = SpikeDetector(os.path.join(work_dir, 'trend_state.json.gz'))
+        wm.detect_emerging_words(state['corpus'], state['results'], detector)
+        detector.save()
+
+    def write():
+        cwd = os.getcwd()
+        os.chdir(work_dir)
+        try:
+            wm.save_results(state['results'], state['headlines'], verbose=False)
+            generate_globe_data()
+        finally:
+            os.chdir(cwd)
+
+    wm.GDELT_DOC_API = api_url
+    try:
+        measure('fetch', fetch, total_articles)
+        measure('dedupe', dedupe, total_articles)
+        measure('tokenize', tokenize, total_articles)
+        measure('cross_dedupe', cross_dedupe, total_articles)
+        measure('rolling', rolling, lambda: state['new_articles'])
+        measure('score', score, total_articles)
+        measure('trends', trends, total_articles)
+        measure('write', write, total_articles)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return metrics
+
+# ------------------------------------------------------------------ output
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+def print_table(report, baseline=None):
+    print(f"\n{'scale':>6} {'stage':<12} {'seconds':>9} {'articles':>9} {'articles/s':>11} {'peak RSS MB':>12}"
+          + ('  vs baseline' if baseline else ''))
+    for scale, stages in report['scales'].items():
+        for stage, row in stages.items():
+            line = (f"{scale + 'x':>6} {stage:<12} {row['seconds']:>9.3f} {row['articles']:>9} "
+                    f"{row['articles_per_second'] or 0:>11.0f} {row['peak_rss_mb']:>12.1f}")
+            old = (baseline or {}).get('scales', {}).get(scale, {}).get(stage)
+            if old and old['seconds']:
+                line += f"  {row['seconds'] / old['seconds']:.2f}x time, {row['peak_rss_mb'] - old['peak_rss_mb']:+.1f} MB"
+            print(line)
+
+def run_benchmark(scales, fixture_path, compare=None):
+    fixture = load_fixture(fixture_path)
+    recorded = sum(len(articles) for articles in fixture['responses'].values())
+    print(f"Fixture: {fixture_path} ({recorded} articles, recorded {fixture['recorded_at']} from {fixture['source']})")
+
+    report = {
+        'commit': git_commit(),
+        'run_at': datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ'),
+        'python': sys.version.split()[0],
+        'platform': sys.platform,
+        'fixture': {'path': fixture_path, 'recorded_at': fixture['recorded_at'], 'articles': recorded},
+        'scales': {},
+    }
+    for scale in scales:
+        print(f"Running {scale}x...")
+        with FixtureServer(fixture['responses'], scale) as server, \
+                ProcessPoolExecutor(max_workers=1, mp_context=get_context('spawn')) as executor:
+            report['scales'][str(scale)] = executor.submit(run_scale, server.url, scale).result()
+
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    output_file = os.path.join(RESULTS_DIR, f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{report['commit']}.json")
+    with open(output_file, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+
+    baseline = None
+    if compare:
+        with open(compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        print(f"\nBaseline: {compare} (commit {baseline.get('commit')})")
+    print_table(report, baseline)
+    print(f"\nResults saved to: {output_file}")
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the pipeline on recorded GDELT responses")
+    parser.add_argument('command', nargs='?', choices=['run', 'record'], default='run')
+    parser.add_argument('--scales', type=int, nargs='+', default=list(DEFAULT_SCALES),
+                        help="Headline volume multiples to run (default: 1 10 100)")
+    parser.add_argument('--fixture', default=FIXTURE_FILE)
+    parser.add_argument('--compare', help="Earlier results file to compare against")
+    parser.add_argument('--from-headlines', action='store_true',
+                        help="record: build the fixture from headlines/ instead of querying GDELT")
+    args = parser.parse_args()
+
+    if args.command == 'record':
+        if args.from_headlines:
+            save_fixture(record_from_headlines(), 'headlines/ shards', args.fixture)
+        else:
+            save_fixture(record_from_gdelt(), 'GDELT DOC API', args.fixture)
+        return
+
+    if not os.path.exists(args.fixture):
+        print(f"[ERROR] No fixture at {args.fixture}; run 'python benchmark.py record' first")
+        sys.exit(1)
+    run_benchmark(args.scales, args.fixture, args.compare)
+
+if __name__ == "__main__":
+    main()
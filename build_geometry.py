@@ -0,0 +1,192 @@
+# -*- coding: utf-8 -*-
+"""
+Build step for the globe's country geometry
+Turns world-atlas's simplified countries-110m TopoJSON into
+countries.topo.json, served next to index.html: arcs re-quantized to
+QUANTIZATION steps, every country polygon tagged with its key in COUNTRIES
+(names resolved here once, not in the browser) and its centroid, plus a
+label point per country (label_positions.json, else the centroid).
+Re-run when the source, the aliases or the label positions change.
+
+Usage:
+    python build_geometry.py                        # Download the pinned world-atlas file
+    python build_geometry.py countries-110m.json    # Use a local copy
+"""
+
+import json
+import sys
+
+import numpy as np
+
+from worldsmood_gdelt import COUNTRIES, normalize_country_name
+
+SOURCE_URL = 'https://cdn.jsdelivr.net/npm/world-atlas@2.0.2/countries-110m.json'
+OUTPUT_FILE = 'countries.topo.json'
+LABEL_POSITIONS_FILE = 'label_positions.json'
+QUANTIZATION = 10000     # Grid steps per axis (world-atlas ships 1e5; 1e4 is ~4 km, plenty at globe scale)
+DEFAULT_LABEL_SIZE = 0.4
+
+# world-atlas (Natural Earth) names that don't normalize to a COUNTRIES key
+# (mirrored by GEOMETRY_NAME_ALIASES in index.html's fallback)
+NAME_ALIASES = {
+    'United States of America': 'United States',
+    'Dem. Rep. Congo': 'Democratic Republic of the Congo',
+    'Congo': 'Republic of the Congo',
+    'Central African Rep.': 'Central African Republic',
+    'Dominican Rep.': 'Dominican Republic',
+    "Côte d'Ivoire": "Cote d'Ivoire",
+    'Eq. Guinea': 'Equatorial Guinea',
+    'eSwatini': 'Eswatini',
+    'Swaziland': 'Eswatini',
+    'Solomon Is.': 'Solomon Islands',
+    'Bosnia and Herz.': 'Bosnia and Herzegovina',
+    'Macedonia': 'North Macedonia',
+    'S. Sudan': 'South Sudan',
+    'Czech Rep.': 'Czechia',
+    'Czech Republic': 'Czechia',
+    'Cape Verde': 'Cabo Verde',
+    'East Timor': 'Timor-Leste',
+    'Russian Federation': 'Russia',
+    "People's Republic of China": 'China',
+    'Republic of Korea': 'South Korea',
+    'Korea': 'South Korea',
+    'The Netherlands': 'Netherlands',
+    'Slovak Republic': 'Slovakia',
+}
+
+def load_topology(source=None):
+    """The source TopoJSON from a local path, else downloaded from SOURCE_URL"""
+    if source:
+        with open(source, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    import requests
+    response = requests.get(SOURCE_URL, timeout=60)
+    response.raise_for_status()
+    return response.json()
+
+def decode_arcs(topology):
+    """Arcs as (n, 2) float arrays of [lng, lat] (undoing quantization and delta encoding)"""
+    transform = topology.get('transform')
+    arcs = []
+    for arc in topology['arcs']:
+        points = np.array(arc, dtype=np.float64)
+        if transform:
+            points = np.cumsum(points, axis=0) * transform['scale'] + transform['translate']
+        arcs.append(points)
+    return arcs
+
+def quantize_arcs(arcs, steps=QUANTIZATION):
+    """Re-quantize decoded arcs onto a steps x steps grid; returns (transform, delta-encoded arcs)"""
+    all_points = np.concatenate(arcs)
+    low, high = all_points.min(axis=0), all_points.max(axis=0)
+    scale = np.where(high > low, (high - low) / (steps - 1), 1.0)
+    transform = {'scale': scale.tolist(), 'translate': low.tolist()}
+
+    encoded = []
+    for points in arcs:
+        grid = np.round((points - low) / scale).astype(np.int64)
+        # Points that now share a grid cell collapse into one (an arc keeps both ends)
+        keep = np.concatenate(([True], np.any(grid[1:] != grid[:-1], axis=1)))
+        grid = grid[keep] if keep.sum() >= 2 else grid[[0, -1]]
+        encoded.append(np.vstack((grid[:1], np.diff(grid, axis=0))).tolist())
+    return transform, encoded
+
+def ring_points(arc_ids, arcs):
+    """One ring's coordinates, stitched from its arcs (~i is arc i reversed)"""
+    parts = []
+    for arc_id in arc_ids:
+        points = arcs[arc_id] if arc_id >= 0 else arcs[~arc_id][::-1]
+        parts.append(points if not parts else points[1:])
+    return np.concatenate(parts)
+
+def ring_centroid(ring):
+    """(area, [lng, lat]) of a ring, treating lng/lat as planar (fine for one country's outline)"""
+    x, y = ring[:, 0], ring[:, 1]
+    cross = x[:-1] * y[1:] - x[1:] * y[:-1]
+    area = cross.sum() / 2
+    if abs(area) < 1e-12:
+        return 0.0, ring.mean(axis=0)
+    return abs(area), np.array([((x[:-1] + x[1:]) * cross).sum(), ((y[:-1] + y[1:]) * cross).sum()]) / (6 * area)
+
+def geometry_centroid(geometry, arcs):
+    """[lng, lat] centroid of the largest polygon's outer ring (so overseas territories don't pull it away)"""
+    polygons = geometry['arcs'] if geometry['type'] == 'MultiPolygon' else [geometry['arcs']]
+    best_area, best_centroid = -1.0, None
+    for polygon in polygons:
+        area, centroid = ring_centroid(ring_points(polygon[0], arcs))
+        if area > best_area:
+            best_area, best_centroid = area, centroid
+    return best_centroid
+
+def resolve_country_key(name, lookup):
+    """COUNTRIES key for a geometry name, or None"""
+    name = NAME_ALIASES.get(name, name)
+    return name if name in COUNTRIES else lookup.get(normalize_country_name(name))
+
+def build_geometry(topology, label_positions):
+    """The output topology: keyed, centroid-tagged country polygons plus label points"""
+    arcs = decode_arcs(topology)
+    transform, encoded_arcs = quantize_arcs(arcs)
+    scale, translate = np.array(transform['scale']), np.array(transform['translate'])
+    lookup = {normalize_country_name(country_name): country_name for country_name in COUNTRIES}
+
+    countries = []
+    centroids = {}
+    unmatched = []
+    for geometry in topology['objects']['countries']['geometries']:
+        if geometry.get('type') not in ('Polygon', 'MultiPolygon'):
+            continue
+        name = geometry.get('properties', {}).get('name', '')
+        key = resolve_country_key(name, lookup)
+        lng, lat = (round(float(value), 4) for value in geometry_centroid(geometry, arcs))
+        properties = {'name': name, 'lat': lat, 'lng': lng}
+        if key:
+            properties['key'] = key
+            # A country split over several geometries keeps its largest piece's centroid
+            centroids.setdefault(key, (lat, lng))
+        else:
+            unmatched.append(name)
+        countries.append({'type': geometry['type'], 'arcs': geometry['arcs'], 'properties': properties})
+
+    labels = []
+    for key in sorted(COUNTRIES):
+        position = label_positions.get(key)
+        if position:
+            lat, lng, size = position['lat'], position['lng'], position['size']
+        elif key in centroids:
+            (lat, lng), size = centroids[key], DEFAULT_LABEL_SIZE
+        else:
+            continue
+        point = np.round((np.array([lng, lat]) - translate) / scale).astype(np.int64).tolist()
+        labels.append({'type': 'Point', 'coordinates': point, 'properties': {'key': key, 'size': size}})
+
+    missing = sorted(set(COUNTRIES) - set(centroids))
+    print(f"Countries with geometry: {len(centroids)}/{len(COUNTRIES)}; labels: {len(labels)}")
+    if unmatched:
+        print(f"  Geometries without a country key (shown as 'no data'): {', '.join(sorted(unmatched))}")
+    if missing:
+        print(f"  Countries too small for the 110m outlines (label only): {', '.join(missing)}")
+
+    return {
+        'type': 'Topology',
+        'transform': transform,
+        'objects': {
+            'countries': {'type': 'GeometryCollection', 'geometries': countries},
+            'labels': {'type': 'GeometryCollection', 'geometries': labels},
+        },
+        'arcs': encoded_arcs,
+    }
+
+def main():
+    source = sys.argv[1] if len(sys.argv) > 1 else None
+    with open(LABEL_POSITIONS_FILE, 'r', encoding='utf-8') as f:
+        label_positions = json.load(f)
+
+    print(f"Loading geometry from: {source or SOURCE_URL}")
+    bundle = build_geometry(load_topology(source), label_positions)
+    with open(OUTPUT_FILE, 'w', encoding='utf-8') as f:
+        json.dump(bundle, f, ensure_ascii=False, separators=(',', ':'))
+    print(f"Geometry saved to: {OUTPUT_FILE}")
+
+if __name__ == "__main__":
+    main()
@@ -5,93 +5,151 @@ Converts Python analysis results to JSON format for the website
 """
 
 import json
+import hashlib
+import math
 import pandas as pd
 from datetime import datetime
 import os
+from results_store import ResultsStore
 
-def generate_globe_data():
-    """Generate JSON data for the interactive globe"""
-    
-    # Try to load the latest CSV file (RSS or GDELT)
-    csv_files = [f for f in os.listdir('.') if (f.startswith('prevalent_words_rss_') or f.startswith('prevalent_words_gdelt_')) and f.endswith('.csv')]
+RESULTS_DB = 'results.db'
+HEADLINES_INDEX = 'headlines/index.json'
+GEOMETRY_FILE = 'countries.topo.json'      # Built by build_geometry.py
+LABEL_POSITIONS_FILE = 'label_positions.json'
+MANIFEST_FILE = 'manifest.json'
+
+def generate_globe_data(day=None):
+    """Generate JSON data for the interactive globe (from `day`'s snapshot, default the latest)"""
     
-    if not csv_files:
-        print("No CSV data found. Please run worldsmood.py first.")
+    if not os.path.exists(RESULTS_DB):
+        print(f"No results found ({RESULTS_DB}). Please run worldsmood_gdelt.py first.")
         return None
     
-    # Get the most recent CSV file
-    latest_csv = max(csv_files, key=os.path.getctime)
-    print(f"Loading data from: {latest_csv}")
-    
     try:
-        df = pd.read_csv(latest_csv)
+        df = ResultsStore(RESULTS_DB).snapshot(day)
     except Exception as e:
-        print(f"Error loading CSV: {e}")
+        print(f"Error loading results: {e}")
         return None
     
-    # Convert DataFrame to dictionary format
-    country_data = {}
+    if len(df) == 0:
+        print(f"No results for {day or 'the latest day'} in {RESULTS_DB}.")
+        return None
+    data_source = f"{RESULTS_DB} ({df['day'].iloc[0]})"
+    print(f"Loading data from: {data_source}")
     
-    for _, row in df.iterrows():
-        country_name = row['country_name']
-        country_data[country_name] = {
-            'prevalent_word': row['prevalent_word'],
-            'word_percentage': float(row['word_percentage']),
-            'prevalence_score': float(row['prevalence_score']),
-            'num_articles': int(row['num_articles']),
-            'week': row.get('week', datetime.now().strftime('%Y-W%U')),
-            'timeframe': row.get('timeframe', '24h')
-        }
+    # One record per country, columns converted as a whole (rows in name order,
+    # so the same results always serialize to the same bytes)
+    df = df.sort_values('country_name', kind='stable').reset_index(drop=True)
+    columns = pd.DataFrame({
+        'prevalent_word': df['prevalent_word'],
+        'word_percentage': df['word_percentage'].astype(float),
+        'prevalence_score': df['prevalence_score'].astype(float),
+        'num_articles': df['num_articles'].astype(int),
+        'week': df['week'],
+        'timeframe': df['timeframe'].fillna('24h'),
+    })
+    records = columns.to_dict('records')
+    
+    # Runner-up words (results from before top-K scoring don't have them)
+    for record, words, percentages in zip(records, split_column(df, 'top_words'), split_column(df, 'top_percentages')):
+        if words:
+            record['top_words'] = [{'word': word, 'percentage': float(pct)} for word, pct in zip(words, percentages)]
     
-    # Add metadata
-    globe_data = {
-        'metadata': {
-            'generated_at': datetime.now().isoformat(),
-            'total_countries': len(country_data),
-            'total_articles': int(df['num_articles'].sum()),
-            'data_source': latest_csv
-        },
-        'countries': country_data
+    # Words surging above their usual share in this country (highest z-score first)
+    for record, words, z_scores in zip(records, split_column(df, 'emerging_words'), split_column(df, 'emerging_scores')):
+        if words:
+            record['emerging'] = [{'word': word, 'z_score': float(z_score)} for word, z_score in zip(words, z_scores)]
+    
+    # Alternative rankings emitted next to the primary one ('<method>_top_words' columns)
+    for column in [c for c in df.columns if c.endswith('_top_words') and c != 'top_words']:
+        method = column[:-len('_top_words')]
+        for record, words in zip(records, split_column(df, column)):
+            if words:
+                record.setdefault('rankings', {})[method] = words
+    
+    country_data = dict(zip(df['country_name'], records))
+    metadata = {
+        'total_countries': len(country_data),
+        'total_articles': int(df['num_articles'].sum()),
+        'data_source': data_source
     }
     
-    # Save to JSON file
+    # The version hashes everything but the timestamp: unchanged results keep
+    # their version, and the file (and its timestamp) is left as it is
+    version = content_version({'metadata': metadata, 'countries': country_data})
     output_file = 'country_data.json'
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(globe_data, f, indent=2, ensure_ascii=False)
-    
-    print(f"Globe data saved to: {output_file}")
+    existing = read_json(output_file)
+    if existing and existing.get('metadata', {}).get('version') == version:
+        globe_data = existing
+        print(f"Globe data unchanged ({version}): {output_file} not rewritten")
+    else:
+        globe_data = {
+            'metadata': {'generated_at': datetime.now().isoformat(), 'version': version, **metadata},
+            'countries': country_data
+        }
+        with open(output_file, 'w', encoding='utf-8') as f:
+            json.dump(globe_data, f, indent=2, ensure_ascii=False)
+        print(f"Globe data saved to: {output_file} ({version})")
     print(f"Countries processed: {len(country_data)}")
     
+    write_manifest(version)
     return globe_data
 
-def create_globe_coordinates():
-    """Create country coordinates for the 3D globe"""
+def split_column(df, column):
+    """'a|b|c' strings of one column as lists (None where missing or absent)"""
+    if column not in df.columns:
+        return [None] * len(df)
+    lists = df[column].astype(object).str.split('|')
+    return lists.astype(object).where(lists.notna(), None).tolist()
+
+def content_version(data):
+    """ETag-style version: a hash of the canonical JSON encoding"""
+    encoded = json.dumps(data, sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha256(encoded.encode('utf-8')).hexdigest()[:16]
+
+def read_json(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def write_manifest(country_data_version):
+    """
+    manifest.json: the current version of each file the page loads. The page
+    fetches it uncached and requests the data files with ?v=<version>, so
+    those can be cached until they change. Rewritten only when a version does.
+    """
+    manifest = {'country_data': {'path': 'country_data.json', 'version': country_data_version}}
+    for name, path in (('headlines', HEADLINES_INDEX), ('geometry', GEOMETRY_FILE)):
+        try:
+            with open(path, 'rb') as f:
+                manifest[name] = {'path': path, 'version': hashlib.sha256(f.read()).hexdigest()[:16]}
+        except OSError:
+            pass
     
-    # Simplified country coordinates (latitude, longitude)
-    country_coords = {
-        'United States': {'lat': 39.8283, 'lon': -98.5795},
-        'Canada': {'lat': 56.1304, 'lon': -106.3468},
-        'United Kingdom': {'lat': 55.3781, 'lon': -3.4360},
-        'Germany': {'lat': 51.1657, 'lon': 10.4515},
-        'France': {'lat': 46.2276, 'lon': 2.2137},
-        'Japan': {'lat': 36.2048, 'lon': 138.2529},
-        'Australia': {'lat': -25.2744, 'lon': 133.7751},
-        'Brazil': {'lat': -14.2350, 'lon': -51.9253},
-        'India': {'lat': 20.5937, 'lon': 78.9629},
-        'South Korea': {'lat': 35.9078, 'lon': 127.7669}
-    }
+    if read_json(MANIFEST_FILE) != manifest:
+        with open(MANIFEST_FILE, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2)
+        print(f"Manifest updated: {MANIFEST_FILE}")
+
+def create_globe_coordinates(radius=1.1):
+    """
+    3D positions of every country's label point (label_positions.json, the
+    points build_geometry.py bakes into the globe), in globe.gl's axes:
+    y towards the north pole, z towards (0, 0), x towards longitude 90.
+    """
+    with open(LABEL_POSITIONS_FILE, 'r', encoding='utf-8') as f:
+        positions = json.load(f)
     
-    # Convert to 3D coordinates on sphere
     coords_3d = {}
-    for country, coords in country_coords.items():
-        lat_rad = coords['lat'] * 3.14159 / 180
-        lon_rad = coords['lon'] * 3.14159 / 180
-        
-        x = 1.1 * (lat_rad / 90) * (lon_rad / 180)
-        y = 1.1 * (lat_rad / 90)
-        z = 1.1 * (lon_rad / 180)
-        
-        coords_3d[country] = {'x': x, 'y': y, 'z': z}
+    for country, position in positions.items():
+        lat, lng = math.radians(position['lat']), math.radians(position['lng'])
+        coords_3d[country] = {
+            'x': radius * math.cos(lat) * math.sin(lng),
+            'y': radius * math.sin(lat),
+            'z': radius * math.cos(lat) * math.cos(lng),
+        }
     
     return coords_3d
 
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+"""
+Per-country headline files for the globe
+Instead of one headlines_data.json with every country's headlines, each
+country gets a minified shard (headlines/US.json) and headlines/index.json
+lists the shards with their headline counts, so the page loads only the
+small index up front and fetches a country's shard when its headlines are
+opened. Every file also gets precompressed .gz (and .br, when the brotli
+package is installed) siblings for servers that serve them directly.
+"""
+
+import gzip
+import hashlib
+import json
+import os
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+INDEX_FILE = 'index.json'
+
+def _encode(data):
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+def _write_if_changed(path, payload):
+    """Write payload and its compressed siblings unless the file already holds it"""
+    if brotli is None and os.path.exists(path + '.br'):
+        os.remove(path + '.br')  # Left by a run that had brotli; would be stale
+    try:
+        with open(path, 'rb') as f:
+            if f.read() == payload:
+                return False
+    except OSError:
+        pass
+
+    variants = [(path, payload), (path + '.gz', gzip.compress(payload, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        variants.append((path + '.br', brotli.compress(payload)))
+    for variant_path, data in variants:
+        tmp_path = variant_path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, variant_path)
+    return True
+
+def write_headline_shards(headlines_data, directory, shard_names):
+    """
+    Write one shard per country in headlines_data ({country_name: {'with_word':
+    [...], 'without_word': [...]}}) named by shard_names[country_name], plus
+    the index, which carries each shard's content hash as its version. Shards
+    of countries no longer listed are removed.
+    Returns the number of files (re)written.
+    """
+    os.makedirs(directory, exist_ok=True)
+    index = {}
+    written = 0
+    for country_name in sorted(headlines_data):
+        headlines = headlines_data[country_name]
+        shard = f"{shard_names[country_name]}.json"
+        payload = _encode(headlines)
+        written += _write_if_changed(os.path.join(directory, shard), payload)
+        index[country_name] = {
+            'shard': shard,
+            'version': hashlib.sha256(payload).hexdigest()[:16],  # Fetched as ?v=<version>
+            'with_word': len(headlines['with_word']),
+            'without_word': len(headlines['without_word']),
+        }
+    written += _write_if_changed(os.path.join(directory, INDEX_FILE), _encode(index))
+
+    # Drop shards (and their compressed siblings) left over from earlier runs
+    current = {entry['shard'] for entry in index.values()} | {INDEX_FILE}
+    for name in os.listdir(directory):
+        base = name[:-3] if name.endswith(('.gz', '.br')) else name
+        if base not in current:
+            os.remove(os.path.join(directory, name))
+    return written
@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+"""
+Near-duplicate headline detection (MinHash + LSH)
+Syndicated wire stories show up many times with small edits ("- Reuters",
+different punctuation, a changed word). Headlines are shingled into word
+bigrams, MinHashed with NumPy and bucketed by LSH bands; candidates that
+share a bucket are confirmed by signature agreement and merged into clusters.
+"""
+
+import re
+import numpy as np
+
+WORD_PATTERN = re.compile(r'\w+')
+MERSENNE_PRIME = np.uint64(4294967311)  # Smallest prime above 2**32
+
+def headline_shingles(texts):
+    """
+    Word-bigram shingles of every headline (the word itself for one-word
+    headlines) as one flat array of ids below MERSENNE_PRIME, plus the number
+    of shingles per headline. Word ids come from a per-call vocabulary, so
+    the same texts always produce the same shingles.
+    """
+    # Ids are assigned text by text, so only the ids (not every word string) are held at once
+    vocabulary = {}
+    all_ids = []
+    lengths = np.zeros(len(texts), dtype=np.int64)
+    for idx, text in enumerate(texts):
+        ids = [vocabulary.setdefault(word, len(vocabulary)) for word in WORD_PATTERN.findall(text.lower())]
+        all_ids.extend(ids)
+        lengths[idx] = len(ids)
+    word_ids = np.array(all_ids, dtype=np.uint64)
+    del all_ids
+
+    # Bigram i pairs word i with word i + 1 unless that crosses into the next headline
+    ends = np.cumsum(lengths)
+    is_last_word = np.zeros(len(word_ids), dtype=bool)
+    is_last_word[ends[lengths > 0] - 1] = True
+    bigrams = (word_ids[:-1] * np.uint64(1000003) + word_ids[1:]) % MERSENNE_PRIME
+    keep = ~is_last_word[:-1]
+    single = lengths == 1
+    shingles = np.concatenate((bigrams[keep], word_ids[ends[single] - 1]))
+    owners = np.concatenate((np.repeat(np.arange(len(lengths)), np.maximum(lengths - 1, 0)),
+                             np.flatnonzero(single)))
+    order = np.argsort(owners, kind='stable')
+    return shingles[order], np.bincount(owners, minlength=len(lengths))
+
+class NearDuplicateDetector:
+    """
+    `num_perm` MinHash functions split into `bands` LSH bands; two headlines
+    are merged when at least `threshold` of their MinHash values agree (an
+    estimate of the Jaccard similarity of their shingle sets).
+    """
+
+    def __init__(self, num_perm=64, bands=16, threshold=0.5, seed=1):
+        rng = np.random.default_rng(seed)
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.threshold = threshold
+        # Multiply-shift hashing: ((a * x + b) mod 2**64) >> 32 with odd a
+        self.a = rng.integers(1, 2 ** 63, size=num_perm, dtype=np.uint64) | np.uint64(1)
+        self.b = rng.integers(0, 2 ** 63, size=num_perm, dtype=np.uint64)
+        self.mix = rng.integers(1, 2 ** 63, size=self.rows, dtype=np.uint64) | np.uint64(1)
+
+    def signatures(self, texts, chunk_size=4096):
+        """
+        (len(texts), num_perm) MinHash signatures, plus a mask of texts that
+        had any shingles. Hashed chunk_size headlines at a time, so the
+        num_perm x shingles working matrix stays small however many texts
+        there are; the hashes fit in 32 bits, and so do the signatures.
+        """
+        shingles, lengths = headline_shingles(texts)
+        has_shingles = lengths > 0
+        signatures = np.full((len(texts), self.num_perm), np.iinfo(np.uint32).max, dtype=np.uint32)
+        ends = np.cumsum(lengths)
+        starts = ends - lengths
+
+        for first in range(0, len(texts), chunk_size):
+            last = min(first + chunk_size, len(texts))
+            rows = np.flatnonzero(has_shingles[first:last]) + first
+            if not len(rows):
+                continue
+            chunk = shingles[starts[first]:ends[last - 1]]
+            hashed = (self.a[:, None] * chunk + self.b[:, None]) >> np.uint64(32)
+            signatures[rows] = np.minimum.reduceat(hashed, starts[rows] - starts[first], axis=1).T
+        return signatures, has_shingles
+
+    def clusters(self, texts):
+        """Cluster label per text: the index of the first text in its near-duplicate cluster"""
+        signatures, has_shingles = self.signatures(texts)
+        parent = np.arange(len(texts))
+
+        def find(i):
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        # Every bucket member is paired with the bucket's first member, across all bands
+        candidates = np.flatnonzero(has_shingles)
+        if not candidates.size:
+            return parent
+        heads = []
+        members = []
+        for band in range(self.bands):
+            band_rows = signatures[candidates, band * self.rows:(band + 1) * self.rows]
+            keys = (band_rows * self.mix).sum(axis=1)  # uint64 wraparound is fine for bucketing
+            order = np.argsort(keys, kind='stable')
+            sorted_keys = keys[order]
+            is_start = np.concatenate(([True], sorted_keys[1:] != sorted_keys[:-1]))
+            bucket_start = np.flatnonzero(is_start)[np.cumsum(is_start) - 1]
+            paired = ~is_start
+            heads.append(candidates[order[bucket_start[paired]]])
+            members.append(candidates[order[paired]])
+
+        # Confirm each distinct pair by MinHash agreement, then merge clusters
+        pair_ids = np.unique(np.concatenate(heads) * len(texts) + np.concatenate(members))
+        pairs = np.stack((pair_ids // len(texts), pair_ids % len(texts)), axis=1)
+        agreement = (signatures[pairs[:, 0]] == signatures[pairs[:, 1]]).mean(axis=1)
+        for head, member in pairs[agreement >= self.threshold].tolist():
+            root_a, root_b = find(head), find(member)
+            if root_a != root_b:
+                parent[max(root_a, root_b)] = min(root_a, root_b)
+
+        return np.array([find(i) for i in range(len(texts))], dtype=np.int64)
@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+"""
+Client-side throttling for GDELT requests
+Shared by the thread pool and asyncio collectors: callers ask how long to
+wait, sleep that long themselves (time.sleep or asyncio.sleep) and ask
+again until the wait is zero, then report how the request went.
+"""
+
+import random
+import threading
+import time
+from collections import deque
+
+class TokenBucket:
+    """
+    Adaptive token bucket. try_acquire() takes a token if one is available
+    and returns 0, otherwise it returns how long until the next one (nothing
+    is reserved, so waiting callers never pile up debt). throttled() halves the rate (GDELT pushed back),
+    at most once per `backoff_interval` so a burst of concurrent 429s counts
+    as one signal; succeeded() adds it back slowly up to max_rate.
+    """
+
+    def __init__(self, rate, burst, min_rate=0.5, recovery_step=0.25, backoff_interval=1.0):
+        self.max_rate = rate
+        self.rate = rate
+        self.burst = burst
+        self.min_rate = min_rate
+        self.recovery_step = recovery_step
+        self.backoff_interval = backoff_interval
+        self.tokens = burst
+        self.updated_at = time.monotonic()
+        self.backed_off_at = 0.0
+        self._lock = threading.Lock()
+
+    def try_acquire(self):
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.rate)
+            self.updated_at = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0.0
+            return (1 - self.tokens) / self.rate
+
+    def throttled(self):
+        with self._lock:
+            now = time.monotonic()
+            if now - self.backed_off_at >= self.backoff_interval:
+                self.rate = max(self.min_rate, self.rate / 2)
+                self.backed_off_at = now
+
+    def succeeded(self):
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.recovery_step)
+
+class CircuitBreaker:
+    """
+    Opens when the error rate over the last `window` requests reaches
+    `threshold` (after at least `min_requests`). While open, every caller
+    waits out the cooldown; each consecutive trip doubles it up to
+    `max_cooldown`, and a success after reopening resets it.
+    """
+
+    def __init__(self, window=20, threshold=0.5, min_requests=10, cooldown=5.0, max_cooldown=60.0):
+        self.outcomes = deque(maxlen=window)
+        self.threshold = threshold
+        self.min_requests = min_requests
+        self.base_cooldown = cooldown
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.open_until = 0.0
+        self.trips = 0
+        self._lock = threading.Lock()
+
+    def delay(self):
+        """Seconds until requests may flow again (0 when closed)"""
+        with self._lock:
+            return max(0.0, self.open_until - time.monotonic())
+
+    def record(self, success):
+        with self._lock:
+            self.outcomes.append(success)
+            if success:
+                if self.open_until and time.monotonic() >= self.open_until:
+                    # First success after a trip closes the breaker again
+                    self.cooldown = self.base_cooldown
+                    self.open_until = 0.0
+                return
+
+            errors = self.outcomes.count(False)
+            if len(self.outcomes) >= self.min_requests and errors / len(self.outcomes) >= self.threshold:
+                if time.monotonic() >= self.open_until:
+                    self.open_until = time.monotonic() + self.cooldown
+                    self.cooldown = min(self.max_cooldown, self.cooldown * 2)
+                    self.trips += 1
+                    self.outcomes.clear()
+
+class RequestThrottle:
+    """Token bucket plus circuit breaker shared by every GDELT request in a run"""
+
+    def __init__(self, rate, burst, **breaker_options):
+        self.bucket = TokenBucket(rate, burst)
+        self.breaker = CircuitBreaker(**breaker_options)
+
+    def acquire(self):
+        """0 when the caller may send its request now, else seconds to sleep before asking again"""
+        return self.breaker.delay() or self.bucket.try_acquire()
+
+    def record(self, success, throttled=False):
+        if throttled:
+            self.bucket.throttled()
+        elif success:
+            self.bucket.succeeded()
+        self.breaker.record(success)
+
+def backoff_delay(attempt, base=1.0, cap=30.0, retry_after=None):
+    """Full-jitter exponential backoff, honouring a server Retry-After (seconds) when given"""
+    if retry_after is not None:
+        return min(cap, retry_after)
+    return random.uniform(0, min(cap, base * 2 ** attempt))
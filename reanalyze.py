@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+"""
+Offline re-analysis from the article archive
+Rebuilds the daily snapshots in results.db, the headline shards and
+country_data.json from archived runs using the current blacklist, stop
+words and scoring - no GDELT requests. Each day is rebuilt from its last run.
+Emerging words are not recomputed (the spike detector's state has moved on
+since); each country keeps the ones stored in the day's existing snapshot.
+
+Usage:
+    python reanalyze.py                          # Latest archived day
+    python reanalyze.py 2025-11-01               # One day
+    python reanalyze.py 2025-10-01 2025-10-31    # Every archived day in a range
+"""
+
+import sys
+import time
+import worldsmood_gdelt as wm
+from article_archive import ArticleArchive
+from generate_globe_data import generate_globe_data
+from results_store import ResultsStore
+
+# Result columns written by the spike detector during the original run
+EMERGING_COLUMNS = ('emerging_words', 'emerging_scores')
+
+def carry_over_emerging(results, day):
+    """Copy each country's emerging columns from the stored snapshot for `day` into the new rows"""
+    previous = ResultsStore(wm.RESULTS_DB).snapshot(day)
+    columns = [column for column in EMERGING_COLUMNS if column in previous.columns]
+    if previous.empty or not columns:
+        return
+    stored = previous.set_index('country_name')[columns].to_dict('index')
+    for row in results:
+        for column, value in stored.get(row['country_name'], {}).items():
+            if isinstance(value, str) and value:  # Missing values come back as NaN/None
+                row[column] = value
+
+def reanalyze_run(archive, path):
+    """Re-run the analysis on one archived run. Returns its day, or None if nothing was scored."""
+    run_time = archive.run_time(path)
+    country_articles, timeframes = archive.read_run(path)
+    
+    # Blacklist entries added since the run was archived still apply
+    headline_filter = wm.NEWS_BLACKLIST['headline_filter']
+    filtered_articles = {}
+    for country_name, articles in country_articles.items():
+        mask = headline_filter.mask([article['title'] for article in articles])
+        kept = [article for article, filtered in zip(articles, mask) if not filtered]
+        if wm.DEDUPE_NEAR_DUPLICATES:
+            kept = wm.collapse_near_duplicates(kept)
+        if kept:
+            filtered_articles[country_name] = kept
+    
+    corpus = wm.build_corpus(filtered_articles)
+    global_counts = None
+    if wm.DEDUPE_NEAR_DUPLICATES:
+        global_counts = corpus.global_counts() - wm.cross_country_duplicate_counts(corpus, filtered_articles)[0]
+    results, headlines_data = wm.analyze_countries(filtered_articles, timeframes, corpus, run_time,
+                                                   verbose=False, global_counts=global_counts)
+    carry_over_emerging(results, run_time.strftime('%Y-%m-%d'))
+    if wm.save_results(results, headlines_data, run_time, verbose=False) is None:
+        return None
+    return run_time.strftime('%Y-%m-%d')
+
+def main():
+    archive = ArticleArchive(wm.ARCHIVE_DIR)
+    days = archive.days()
+    if not days:
+        print(f"[ERROR] No archived runs in {wm.ARCHIVE_DIR}/")
+        sys.exit(1)
+    
+    first_day = sys.argv[1] if len(sys.argv) > 1 else days[-1]
+    last_day = sys.argv[2] if len(sys.argv) > 2 else first_day
+    selected = [day for day in days if first_day <= day <= last_day]
+    if not selected:
+        print(f"[ERROR] No archived runs between {first_day} and {last_day}")
+        sys.exit(1)
+    
+    started = time.perf_counter()
+    last_day = None
+    for day in selected:
+        runs = archive.runs(day)
+        if runs:
+            last_day = reanalyze_run(archive, runs[-1]) or last_day
+    
+    if last_day is None:
+        print("[ERROR] No results to save!")
+        sys.exit(1)
+    
+    # The headline shards are from the last day processed; build the globe data to match
+    generate_globe_data(last_day)
+    print(f"\n[SUCCESS] Re-analyzed {len(selected)} day(s) in {time.perf_counter() - started:.1f}s")
+
+if __name__ == "__main__":
+    main()
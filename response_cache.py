@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+"""
+On-disk TTL cache for GDELT DOC API responses
+Keeps raw article lists between runs so slow-moving fallback queries
+(7d/30d) are not re-fetched every six hours.
+"""
+
+import json
+import os
+import time
+import hashlib
+import threading
+
+class ResponseCache:
+    """
+    One JSON file per query, named by a hash of the request parameters.
+    Freshness is judged by file mtime against a per-timespan TTL; prune()
+    evicts entries past `max_age` and then the oldest ones until the cache
+    fits within `max_entries` / `max_bytes`. The directory is only created
+    by the first put(), so building a cache touches nothing on disk.
+    """
+
+    def __init__(self, directory, ttl_by_timespan, default_ttl=3600,
+                 max_entries=2000, max_bytes=200 * 1024 * 1024, max_age=2 * 24 * 3600):
+        self.directory = directory
+        self.ttl_by_timespan = ttl_by_timespan
+        self.default_ttl = default_ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def _path(self, params):
+        key = json.dumps(params, sort_keys=True)
+        return os.path.join(self.directory, hashlib.sha1(key.encode('utf-8')).hexdigest() + '.json')
+
+    def _count(self, hit):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def get(self, params):
+        """Return the cached raw article list for these params, or None if missing/stale"""
+        path = self._path(params)
+        ttl = self.ttl_by_timespan.get(params.get('timespan'), self.default_ttl)
+        try:
+            if time.time() - os.path.getmtime(path) > ttl:
+                self._count(False)
+                return None
+            with open(path, 'r', encoding='utf-8') as f:
+                articles = json.load(f)['articles']
+        except (OSError, ValueError, KeyError):
+            self._count(False)
+            return None
+        self._count(True)
+        return articles
+
+    def put(self, params, articles):
+        """Store a raw article list (atomic replace, safe across worker threads)"""
+        path = self._path(params)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'params': params, 'articles': articles}, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except OSError:
+            # A failed cache write must never break a run
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def prune(self):
+        """Evict by age, then oldest-first by entry count and total size. Returns number removed."""
+        now = time.time()
+        entries = []
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return 0  # Nothing cached yet
+        for name in names:
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        entries.sort(reverse=True)  # Newest first
+        kept = []
+        removed = 0
+        total_bytes = 0
+        for mtime, size, path in entries:
+            too_old = now - mtime > self.max_age or path.endswith('.tmp')
+            too_many = len(kept) >= self.max_entries or total_bytes + size > self.max_bytes
+            if too_old or too_many:
+                try:
+                    os.remove(path)
+                    removed += 1
+                except OSError:
+                    pass
+                continue
+            kept.append(path)
+            total_bytes += size
+        return removed
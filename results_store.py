@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+"""
+SQLite store for analysis results
+One table of per-country results, one snapshot per day (a later run on the
+same day replaces it, like the daily CSVs did), indexed by day and by
+country so the latest snapshot and per-country history are single queries.
+"""
+
+import json
+import sqlite3
+
+# Columns stored as-is; anything else in a result row (e.g. '<method>_top_words')
+# goes into the JSON 'extra' column
+RESULT_COLUMNS = [
+    'country_name', 'week', 'prevalent_word', 'word_frequency', 'word_percentage',
+    'prevalence_score', 'num_articles', 'timeframe', 'top_words', 'top_percentages',
+]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    day TEXT NOT NULL,
+    run_time TEXT NOT NULL,
+    country_name TEXT NOT NULL,
+    week TEXT,
+    prevalent_word TEXT,
+    word_frequency INTEGER,
+    word_percentage REAL,
+    prevalence_score REAL,
+    num_articles INTEGER,
+    timeframe TEXT,
+    top_words TEXT,
+    top_percentages TEXT,
+    extra TEXT,
+    PRIMARY KEY (day, country_name)
+);
+CREATE INDEX IF NOT EXISTS idx_results_country ON results (country_name, day);
+"""
+
+class ResultsStore:
+    """Results history in one SQLite file"""
+
+    def __init__(self, path):
+        self.path = path
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    def _connect(self):
+        return sqlite3.connect(self.path)
+
+    def append(self, run_time, rows):
+        """Store one run's result rows as the snapshot for its day (replacing an earlier one)"""
+        day = run_time.strftime('%Y-%m-%d')
+        records = []
+        for row in rows:
+            extra = {key: value for key, value in row.items()
+                     if key not in RESULT_COLUMNS and value is not None and value == value}  # Skip NaN gaps
+            records.append([day, run_time.isoformat(timespec='seconds')] +
+                           [row.get(column) for column in RESULT_COLUMNS] +
+                           [json.dumps(extra, ensure_ascii=False) if extra else None])
+        placeholders = ', '.join('?' * (len(RESULT_COLUMNS) + 3))
+        with self._connect() as conn:
+            conn.execute("DELETE FROM results WHERE day = ?", (day,))
+            conn.executemany(
+                f"INSERT INTO results (day, run_time, {', '.join(RESULT_COLUMNS)}, extra) VALUES ({placeholders})",
+                records)
+
+    def days(self):
+        """Days with a snapshot, oldest first"""
+        with self._connect() as conn:
+            return [day for (day,) in conn.execute("SELECT DISTINCT day FROM results ORDER BY day")]
+
+    def snapshot(self, day=None):
+        """One day's results (default the latest day) as a DataFrame sorted by score"""
+        day_clause = "?" if day else "(SELECT MAX(day) FROM results)"
+        return self._query(f"SELECT * FROM results WHERE day = {day_clause} ORDER BY prevalence_score DESC, rowid",
+                           (day,) if day else ())
+
+    def country_history(self, country_name, since=None):
+        """One country's daily results, oldest first (optionally from `since`, 'YYYY-MM-DD')"""
+        return self._query("SELECT * FROM results WHERE country_name = ? AND day >= ? ORDER BY day",
+                           (country_name, since or ''))
+
+    def _query(self, sql, params):
+        import pandas as pd
+        with self._connect() as conn:
+            df = pd.read_sql_query(sql, conn, params=params)
+        # Expand the JSON 'extra' column back into ordinary columns
+        extra = [json.loads(value) if value else {} for value in df.pop('extra')]
+        if any(extra):
+            df = df.join(pd.DataFrame(extra, index=df.index))
+        return df
+
+    def import_csv(self, path, run_time):
+        """Load a legacy prevalent_words_*.csv as the snapshot for run_time's day"""
+        import pandas as pd
+        df = pd.read_csv(path)
+        rows = [{key: value for key, value in row.items() if not pd.isna(value)}
+                for row in df.to_dict('records')]
+        self.append(run_time, rows)
+        return len(rows)
+
+if __name__ == "__main__":
+    # Migrate old daily CSVs: python results_store.py results.db prevalent_words_gdelt_*.csv
+    import os
+    import sys
+    from datetime import datetime
+    
+    store = ResultsStore(sys.argv[1])
+    for csv_path in sys.argv[2:]:
+        stamp = os.path.basename(csv_path).rsplit('_', 1)[-1][:-len('.csv')]
+        count = store.import_csv(csv_path, datetime.strptime(stamp, '%Y%m%d'))
+        print(f"Imported {csv_path}: {count} countries")
@@ -0,0 +1,201 @@
+# -*- coding: utf-8 -*-
+"""
+Rolling-window word statistics kept between runs
+Per-country, per-term document counts bucketed by article day, so scoring
+can compare today's headlines against a multi-day baseline without
+re-reading history.
+"""
+
+import gzip
+import json
+import os
+from collections import Counter
+from datetime import datetime, timedelta
+
+from sketches import CountMinSketch, HeavyHitters
+
+class RollingWordStats:
+    """
+    One gzip JSON file per day bucket under `directory`, plus running totals
+    over the last `window_days` days. add_run() only counts articles whose
+    URL its day's bucket hasn't seen, and only loads the buckets those fall
+    in; expiring a day subtracts that one bucket from the totals and deletes
+    its file, whatever the history length.
+
+    With `sketch_width` set, the all-country totals live in a count-min
+    sketch of that width (global_sketch.npz) plus a top-`heavy_hitters`
+    list instead of an exact dict, so they stay the same size however many
+    words the window holds (the per-country totals stay exact). A run in
+    exact mode deletes the sketch, so switching back rebuilds it.
+    """
+
+    def __init__(self, directory, window_days, sketch_width=0, sketch_depth=4, heavy_hitters=50):
+        self.directory = directory
+        self.window_days = window_days
+        self.buckets = {}  # Buckets loaded (or created) this run, by day
+        os.makedirs(directory, exist_ok=True)
+        self.totals = self._load('totals') or {'days': [], 'articles': {}, 'terms': {}}
+
+        self.sketch = None
+        self.heavy = None
+        if sketch_width:
+            self.sketch = CountMinSketch(sketch_width, sketch_depth)
+            self.heavy = HeavyHitters(self.sketch, heavy_hitters, self.totals.get('heavy', []))
+            if not self.sketch.load(self._sketch_path()):
+                # First sketch run (or new size): seed it from the exact per-country totals
+                for terms in self.totals['terms'].values():
+                    self._add_global(terms)
+            self.totals.pop('global', None)
+        elif 'global' not in self.totals:
+            self.totals['global'] = {}
+            for terms in self.totals['terms'].values():
+                self._add(self.totals['global'], terms)
+
+    def _path(self, name):
+        return os.path.join(self.directory, f"{name}.json.gz")
+
+    def _load(self, name):
+        try:
+            with gzip.open(self._path(name), 'rt', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write(self, name, data):
+        tmp_path = self._path(name) + '.tmp'
+        with gzip.open(tmp_path, 'wt', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(tmp_path, self._path(name))
+
+    def _sketch_path(self):
+        return os.path.join(self.directory, 'global_sketch.npz')
+
+    def _add_global(self, terms, sign=1):
+        if self.sketch is not None:
+            self.sketch.add(terms, sign)
+            if sign > 0:
+                self.heavy.offer(terms)
+        else:
+            self._add(self.totals['global'], terms, sign)
+
+    def _bucket(self, day):
+        if day not in self.buckets:
+            self.buckets[day] = self._load(day) or {'urls': [], 'articles': {}, 'terms': {}}
+            self.buckets[day]['seen'] = set(self.buckets[day]['urls'])
+        return self.buckets[day]
+
+    @staticmethod
+    def _add(target, source, sign=1):
+        """target[key] += sign * source[key], dropping keys that reach zero"""
+        for key, count in source.items():
+            total = target.get(key, 0) + sign * count
+            if total > 0:
+                target[key] = total
+            else:
+                target.pop(key, None)
+
+    def _add_counts(self, target, source, sign=1):
+        """target[country][term] += sign * source[country][term]"""
+        for country_name, terms in source.items():
+            self._add(target.setdefault(country_name, {}), terms, sign)
+            if not target[country_name]:
+                del target[country_name]
+
+    def add_run(self, country_articles, headline_words, run_time=None):
+        """
+        Count the articles not seen before into their day's bucket (by the
+        article's GDELT seendate), then expire days outside the window.
+        headline_words(country_name) gives the words of each of that
+        country's articles, in order (already tokenized, e.g. by the corpus).
+        Returns the number of new articles.
+        """
+        run_time = run_time or datetime.now()
+        oldest_day = (run_time - timedelta(days=self.window_days - 1)).strftime('%Y-%m-%d')
+        new_articles = 0
+        new_terms = {}
+        new_counts = {}
+
+        for country_name, articles in country_articles.items():
+            for article, words in zip(articles, headline_words(country_name)):
+                seendate = article.get('date') or run_time.strftime('%Y%m%d')
+                day = f"{seendate[:4]}-{seendate[4:6]}-{seendate[6:8]}"
+                if day < oldest_day:
+                    continue
+                bucket = self._bucket(day)
+                key = article.get('url') or article['title']
+                if key in bucket['seen']:
+                    continue
+                bucket['seen'].add(key)
+                bucket['urls'].append(key)
+                new_articles += 1
+
+                self._add(bucket['articles'], {country_name: 1})
+                self._add(bucket['terms'].setdefault(country_name, {}), dict.fromkeys(words, 1))
+                new_counts[country_name] = new_counts.get(country_name, 0) + 1
+                new_terms.setdefault(country_name, Counter()).update(words)
+                if day not in self.totals['days']:
+                    self.totals['days'].append(day)
+
+        # Fold the new counts into the window totals
+        self._add_counts(self.totals['terms'], new_terms)
+        for terms in new_terms.values():
+            self._add_global(terms)
+        self._add(self.totals['articles'], new_counts)
+
+        for day in sorted(self.totals['days']):
+            if day < oldest_day:
+                self.expire(day)
+        return new_articles
+
+    def expire(self, day):
+        """Drop one day bucket: subtract it from the totals and delete its file"""
+        bucket = self.buckets.pop(day, None) or self._load(day)
+        if bucket:
+            self._add_counts(self.totals['terms'], bucket['terms'], sign=-1)
+            for terms in bucket['terms'].values():
+                self._add_global(terms, sign=-1)
+            self._add(self.totals['articles'], bucket['articles'], sign=-1)
+        if day in self.totals['days']:
+            self.totals['days'].remove(day)
+        if os.path.exists(self._path(day)):
+            os.remove(self._path(day))
+
+    def save(self):
+        """Write the buckets touched this run and the totals"""
+        for day, bucket in self.buckets.items():
+            self._write(day, {key: value for key, value in bucket.items() if key != 'seen'})
+        if self.sketch is not None:
+            self.totals['heavy'] = [word for word, _ in self.heavy.top()]
+            self.sketch.save(self._sketch_path())
+        else:
+            # The sketch stops tracking the window; a later sketch run reseeds it from the totals
+            self.totals.pop('heavy', None)
+            if os.path.exists(self._sketch_path()):
+                os.remove(self._sketch_path())
+        self._write('totals', self.totals)
+
+    def total_articles(self):
+        """Articles in the window, all countries"""
+        return sum(self.totals['articles'].values())
+
+    def global_count(self, term):
+        """Articles in the window containing `term`, all countries (an upper-bound estimate in sketch mode)"""
+        if self.sketch is not None:
+            return int(self.sketch.estimate([term])[0])
+        return self.totals['global'].get(term, 0)
+
+    def global_counts(self, terms):
+        """global_count() for a list of terms at once"""
+        if self.sketch is not None:
+            return self.sketch.estimate(list(terms))
+        return [self.totals['global'].get(term, 0) for term in terms]
+
+    def top_terms(self, n=10):
+        """[(term, articles)] most common over the window, all countries"""
+        if self.sketch is not None:
+            return self.heavy.top(n)
+        return Counter(self.totals['global']).most_common(n)
+
+    def country_counts(self, country_name):
+        """{term: articles} for one country over the window"""
+        return self.totals['terms'].get(country_name, {})
@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+"""
+Fixed-size summaries for word counts that would otherwise grow with the input
+A count-min sketch estimates any word's count from a constant-size table, and
+a heavy-hitter list keeps the top words exactly enough to print them.
+"""
+
+import os
+import zlib
+
+import numpy as np
+
+class CountMinSketch:
+    """
+    `depth` rows of `width` counters (width a power of two). A word adds to
+    one counter per row and its estimate is the smallest of those, so counts
+    are never underestimated and overestimate by about total / width at most.
+    Updates are plain additions, so subtracting an earlier add (sign=-1)
+    undoes it exactly. Hashes come from crc32 and fixed per-row multipliers,
+    so a saved sketch stays valid across processes and runs.
+    """
+
+    def __init__(self, width=2 ** 16, depth=4, seed=1):
+        if width & (width - 1):
+            raise ValueError("width must be a power of two")
+        self.width = width
+        self.depth = depth
+        self.shift = np.uint64(64 - (width.bit_length() - 1))
+        rng = np.random.default_rng(seed)
+        self.multipliers = rng.integers(1, 2 ** 63, size=depth, dtype=np.uint64) | np.uint64(1)
+        self.offsets = rng.integers(0, 2 ** 63, size=depth, dtype=np.uint64)
+        self.table = np.zeros((depth, width), dtype=np.int32)
+
+    def _columns(self, words):
+        """depth x len(words) counter positions"""
+        hashes = np.fromiter((zlib.crc32(word.encode('utf-8')) for word in words),
+                             dtype=np.uint64, count=len(words))
+        return (self.multipliers[:, None] * hashes[None, :] + self.offsets[:, None]) >> self.shift
+
+    def add(self, counts, sign=1):
+        """Add sign * count for each {word: count}"""
+        if not counts:
+            return
+        words = list(counts)
+        values = sign * np.fromiter(counts.values(), dtype=np.int32, count=len(words))
+        columns = self._columns(words)
+        for row in range(self.depth):
+            np.add.at(self.table[row], columns[row], values)
+
+    def estimate(self, words):
+        """Estimated counts for a list of words (numpy int64 array)"""
+        if not words:
+            return np.zeros(0, dtype=np.int64)
+        columns = self._columns(words)
+        return np.maximum(self.table[np.arange(self.depth)[:, None], columns].min(axis=0), 0).astype(np.int64)
+
+    def save(self, path):
+        """Compressed .npz (a sparse table shrinks to a fraction of its size)"""
+        tmp_path = path + '.tmp.npz'
+        np.savez_compressed(tmp_path, table=self.table)
+        os.replace(tmp_path, path)
+
+    def load(self, path):
+        """Replace the table with a saved one of the same shape; False if missing or mismatched"""
+        try:
+            with np.load(path) as data:
+                table = data['table']
+        except (OSError, ValueError, KeyError):
+            return False
+        if table.shape != self.table.shape:
+            return False
+        self.table = table.astype(np.int32, copy=False)
+        return True
+
+class HeavyHitters:
+    """
+    Top-k words by sketch estimate. Candidates are offered as they are
+    counted; the list is re-ranked against the sketch (whose counts may also
+    have dropped) and cut back to k once it holds 2k words.
+    """
+
+    def __init__(self, sketch, k, words=()):
+        self.sketch = sketch
+        self.k = k
+        self.candidates = set(words)
+
+    def offer(self, words):
+        self.candidates.update(words)
+        if len(self.candidates) >= 2 * self.k:
+            self.candidates = {word for word, _ in self.top()}
+
+    def top(self, n=None):
+        """[(word, estimated count)] best first, ties by word"""
+        words = sorted(self.candidates)
+        estimates = self.sketch.estimate(words)
+        ranked = sorted(zip(words, estimates.tolist()), key=lambda item: -item[1])
+        return [(word, count) for word, count in ranked[:n or self.k] if count > 0]
@@ -0,0 +1,25 @@
+# -*- coding: utf-8 -*-
+"""Per-headline language guesses must not hinge on one shared stop word"""
+
+import worldsmood_gdelt as wm
+
+def test_single_shared_stop_word_is_not_a_language():
+    # "hit" is a Swedish stop word, "asia" a Finnish one, "as" English: no clear winner
+    assert wm.detect_language(wm.split_headline("Floods hit Asia as storm nears")) is None
+    assert wm.detect_language(wm.split_headline("Storm hit Asia"), default='english') == 'english'
+
+def test_clear_winner_is_kept():
+    tokens = wm.split_headline("El gobierno de la nación anuncia un plan para los precios")
+    assert wm.detect_language(tokens) == 'spanish'
+
+def test_short_english_headlines_keep_their_content_words():
+    headlines = [
+        "Floods hit Asia as storm nears",
+        "Row over door policy",
+        "Storm hit Asia",
+        "The president is in the city for talks",
+    ]
+    tokens = wm.get_headline_tokens(headlines)
+    assert 'asia' in tokens[0]
+    assert 'door' in tokens[1]  # "over" and "door" are both Dutch stop words
+    assert tokens[2] == ['storm', 'asia']
@@ -0,0 +1,20 @@
+import numpy as np
+
+from near_duplicates import NearDuplicateDetector
+
+
+def test_clusters_without_any_shingles():
+    detector = NearDuplicateDetector()
+    assert detector.clusters([]).tolist() == []
+    assert detector.clusters(['!!!', '???']).tolist() == [0, 1]
+
+
+def test_clusters_merge_copies_into_first_headline():
+    labels = NearDuplicateDetector().clusters([
+        '!!!',
+        'Storm hits the coast as thousands flee - Reuters',
+        'Parliament passes the new budget',
+        'Storm hits the coast as thousands flee',
+    ])
+    assert labels.dtype == np.int64
+    assert labels.tolist() == [0, 1, 2, 1]
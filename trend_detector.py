@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+"""
+Online spike detection over each country's word shares
+Every run updates an exponentially weighted mean and variance of the share
+of a country's articles containing each word; words whose share jumps well
+above their usual level are reported as emerging.
+"""
+
+import gzip
+import json
+import math
+import os
+
+class SpikeDetector:
+    """
+    EWMA / z-score detector with its whole state in one gzip JSON file:
+    {country: {'runs': n, 'terms': {word: [mean, variance]}}}.
+    update() touches only the words one country is tracking, and words whose
+    mean share decays below `min_mean` are forgotten, so the cost of a run
+    does not grow with the length of the history.
+    """
+
+    def __init__(self, path, alpha=0.2, threshold=3.0, min_count=3, min_std=0.02,
+                 warmup_runs=4, min_mean=0.002):
+        self.path = path
+        self.alpha = alpha            # EWMA weight of the newest run
+        self.threshold = threshold    # z-score needed to count as a spike
+        self.min_count = min_count    # Articles a word needs this run to be reported
+        self.min_std = min_std        # Std floor so brand-new words don't divide by ~0
+        self.warmup_runs = warmup_runs
+        self.min_mean = min_mean
+        self.state = {}
+        try:
+            with gzip.open(path, 'rt', encoding='utf-8') as f:
+                self.state = json.load(f)
+        except (OSError, ValueError):
+            pass
+
+    def update(self, country_name, term_counts, num_articles):
+        """
+        Fold one run's {word: articles} for a country into the state.
+        Returns [(word, z_score, share %)] for words spiking this run, highest z first.
+        """
+        country = self.state.setdefault(country_name, {'runs': 0, 'terms': {}})
+        terms = country['terms']
+        spikes = []
+
+        for word in set(terms) | set(term_counts):
+            count = term_counts.get(word, 0)
+            share = count / num_articles if num_articles else 0.0
+            mean, variance = terms.get(word, (0.0, 0.0))
+
+            z_score = (share - mean) / max(math.sqrt(variance), self.min_std)
+            if country['runs'] >= self.warmup_runs and count >= self.min_count and z_score >= self.threshold:
+                spikes.append((word, round(z_score, 2), round(share * 100, 2)))
+
+            # Exponentially weighted mean and variance (West 1979 incremental form)
+            diff = share - mean
+            increment = self.alpha * diff
+            mean += increment
+            variance = (1 - self.alpha) * (variance + diff * increment)
+            if mean < self.min_mean:
+                terms.pop(word, None)
+            else:
+                terms[word] = [round(mean, 6), round(variance, 8)]
+
+        country['runs'] += 1
+        spikes.sort(key=lambda spike: (-spike[1], spike[0]))
+        return spikes
+
+    def save(self):
+        tmp_path = self.path + '.tmp'
+        with gzip.open(tmp_path, 'wt', encoding='utf-8') as f:
+            json.dump(self.state, f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(tmp_path, self.path)
@@ -4,7 +4,7 @@ Verify blacklist is working by checking current prevalent words
 """
 
 import json
-import pandas as pd
+from results_store import ResultsStore
 
 print("="*80)
 print("BLACKLIST VERIFICATION")
@@ -17,8 +17,8 @@ with open('news_blacklist.json', 'r', encoding='utf-8') as f:
 
 print(f"\nBlacklist loaded: {len(blacklist)} words")
 
-# Load current prevalent words
-df = pd.read_csv('prevalent_words_gdelt_20251026.csv')
+# Load current prevalent words (latest daily snapshot)
+df = ResultsStore('results.db').snapshot()
 
 print(f"Total countries: {len(df)}")
 
@@ -4,31 +4,111 @@ World's Mood - News Analysis with GDELT Project
 Truly unlimited, free global news coverage!
 """
 
-import requests
-import pandas as pd
-from datetime import datetime
+import numpy as np
+from datetime import datetime, timedelta, timezone
 import time
 from collections import Counter
+from functools import lru_cache
 import re
 import sys
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import bisect
+import unicodedata
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, wait, FIRST_COMPLETED
 import json
+import asyncio
+import os
+import importlib.util
+import multiprocessing
+from response_cache import ResponseCache
+from article_archive import ArticleArchive
+from results_store import ResultsStore
+from headline_shards import write_headline_shards
+from rolling_stats import RollingWordStats
+from trend_detector import SpikeDetector
+from near_duplicates import NearDuplicateDetector
+from rate_limit import RequestThrottle, backoff_delay
 
 # GDELT API Configuration
 GDELT_DOC_API = 'http://api.gdeltproject.org/api/v2/doc/doc'
 
-# Try to import NLTK
-try:
-    import nltk
-    from nltk.corpus import stopwords
-    from nltk.tokenize import word_tokenize
-    nltk.download('punkt', quiet=True)
-    nltk.download('punkt_tab', quiet=True)
-    nltk.download('stopwords', quiet=True)
-    USE_NLTK = True
-except:
-    USE_NLTK = False
-    print("NLTK not available, using basic tokenization")
+# Fetch engine configuration
+FETCH_CONCURRENCY = 10   # Max GDELT requests in flight at once
+FETCH_TIMEOUT = 30       # Seconds allowed per request
+USE_ASYNC_FETCH = True   # Use the asyncio collector when aiohttp is installed
+
+# Timespans tried per country, in order. A country moves to the next one as
+# soon as its previous query comes back empty, e.g. ['24h', '3d', '7d', '30d']
+TIMESPAN_ESCALATION = ['24h', '7d', '30d']
+
+# Response cache configuration (set WORLDSMOOD_NO_CACHE=1 to bypass)
+USE_RESPONSE_CACHE = os.environ.get('WORLDSMOOD_NO_CACHE', '') not in ('1', 'true', 'yes')
+CACHE_DIR = '.gdelt_cache'
+CACHE_TTL = {     # Seconds a cached response stays fresh, per timespan
+    '24h': 20 * 60,
+    '3d': 60 * 60,
+    '7d': 3 * 60 * 60,
+    '30d': 12 * 60 * 60,
+}
+CACHE_MAX_ENTRIES = 2000
+CACHE_MAX_AGE = 2 * 24 * 60 * 60
+
+# Every run's articles are archived here for offline re-analysis (reanalyze.py)
+USE_ARTICLE_ARCHIVE = True
+ARCHIVE_DIR = 'archive'
+ARCHIVE_RETENTION_DAYS = 60     # Older days are deleted at the end of each run
+
+# Results history (one snapshot per day), read by generate_globe_data.py
+RESULTS_DB = 'results.db'
+
+# Headlines for the site: one minified shard per country plus index.json
+HEADLINES_DIR = 'headlines'
+
+# Per-country word counts over the last ROLLING_WINDOW_DAYS days, updated
+# incrementally each run; with USE_ROLLING_BASELINE words are scored against
+# that window's global counts instead of this run's alone
+USE_ROLLING_STATS = True
+ROLLING_STATE_DIR = 'rolling_state'
+ROLLING_WINDOW_DAYS = 7
+USE_ROLLING_BASELINE = False
+
+# Sketch mode: keep the window's all-country word counts in a fixed-size
+# count-min sketch (SKETCH_DEPTH x SKETCH_WIDTH counters) with a top-K
+# heavy-hitter list instead of an exact dict, so state and memory stay flat
+# as collection grows; counts become slight overestimates
+USE_SKETCH_COUNTS = False
+SKETCH_WIDTH = 2 ** 16
+SKETCH_DEPTH = 4
+HEAVY_HITTERS_K = 50
+
+# Emerging words: an EWMA/z-score detector over each country's word shares,
+# updated every run; state lives in TREND_STATE_FILE
+USE_TREND_DETECTION = True
+TREND_STATE_FILE = 'trend_state.json.gz'
+EMERGING_TOP_K = 5
+
+# Throttling and retry configuration (shared by all workers)
+GDELT_RATE_LIMIT = 10.0  # Requests per second; halved on each 429, recovers slowly
+GDELT_BURST = 10         # Requests allowed back-to-back before the rate applies
+FETCH_RETRIES = 3        # Extra attempts on 429/5xx/timeouts before giving up
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+# Fetch outcome statuses
+FETCH_OK = 'ok'          # Articles returned
+FETCH_EMPTY = 'empty'    # GDELT answered, but has nothing for this timespan
+FETCH_FAILED = 'failed'  # Non-retryable error, or still failing after retries
+
+# aiohttp powers the asyncio collector; it is only imported on first use
+USE_AIOHTTP = importlib.util.find_spec('aiohttp') is not None
+
+# Stop words come from the bundled pack (stopwords.json) by default, so no
+# NLTK import or download is needed. Set WORLDSMOOD_USE_NLTK=1 to use NLTK's
+# corpus instead; it is loaded (and downloaded if missing) on first use.
+USE_NLTK = os.environ.get('WORLDSMOOD_USE_NLTK', '') in ('1', 'true', 'yes')
+STOPWORDS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'stopwords.json')
+# A headline's language is the one whose stop words it uses most, but only when
+# it leads the runner-up by this many votes; closer calls fall back to the
+# language of the country's headlines as a whole
+LANGUAGE_VOTE_MARGIN = 2
 
 # Country codes for GDELT
 # GDELT uses FIPS 10-4 country codes
@@ -232,6 +312,130 @@ COUNTRIES = {
 # Maximum articles to fetch per country
 MAX_ARTICLES_PER_COUNTRY = 30
 
+# Deep collection: after the normal pass, re-query each country's timeframe as
+# DEEP_WINDOWS startdatetime/enddatetime sub-windows of up to DEEP_MAX_RECORDS
+# articles each, deduped by URL, stopping early once the vocabulary saturates
+DEEP_COLLECTION = False
+DEEP_WINDOWS = 8
+DEEP_MAX_RECORDS = 250          # GDELT's maxrecords cap
+DEEP_PARALLEL_WINDOWS = 3       # Windows in flight per country
+DEEP_SATURATION = 0.05          # Stop when a window's words are < 5% new to the country
+
+# Batch collection: query groups of countries with one OR-combined
+# sourcecountry: query and split the articles back out client-side.
+# The batch size halves when a response hits BATCH_MAX_RECORDS and doubles
+# when responses come back under half full
+BATCH_COLLECTION = False
+BATCH_SIZE = 16                 # Countries per query to start with
+BATCH_MAX_SIZE = 48
+BATCH_MAX_RECORDS = 250
+
+# GDELT sourcecountry names (FIPS 10-4 style) that don't normalize to a COUNTRIES key
+SOURCE_COUNTRY_ALIASES = {
+    'Czech Republic': 'Czechia',
+    'Bosnia-Herzegovina': 'Bosnia and Herzegovina',
+    'Burma': 'Myanmar',
+    'Cape Verde': 'Cabo Verde',
+    'Congo': 'Republic of the Congo',
+    'Congo, Republic of the': 'Republic of the Congo',
+    'Congo, Democratic Republic of the': 'Democratic Republic of the Congo',
+    'Ivory Coast': "Cote d'Ivoire",
+    "Côte d'Ivoire": "Cote d'Ivoire",
+    'East Timor': 'Timor-Leste',
+    'Macedonia': 'North Macedonia',
+    'Swaziland': 'Eswatini',
+    'Korea, South': 'South Korea',
+    'Korea, North': 'North Korea',
+    'Gambia, The': 'Gambia',
+    'Bahamas, The': 'Bahamas',
+    'Federated States of Micronesia': 'Micronesia',
+    'Micronesia, Federated States of': 'Micronesia',
+    'Russian Federation': 'Russia',
+    'Turkiye': 'Turkey',
+}
+
+# Number of top-scoring words kept per country (the first is the prevalent word)
+TOP_K_WORDS = 5
+
+# Word ranking: SCORING_METHOD picks the prevalent word, EXTRA_SCORING_METHODS
+# are emitted side by side in the CSV for comparison (see SCORERS)
+SCORING_METHOD = 'prevalence'
+EXTRA_SCORING_METHODS = ['tfidf', 'log_odds']
+LOG_ODDS_PRIOR_STRENGTH = 1000  # Pseudo-counts of the global prior in log-odds scoring
+
+# Near-duplicate headlines (syndicated copies) count once: they are collapsed
+# within each country before counting, and copies across countries count once
+# in the global frequencies
+DEDUPE_NEAR_DUPLICATES = True
+NEAR_DUPLICATE_THRESHOLD = 0.5  # Estimated Jaccard similarity of word bigrams
+
+# Worker processes for tokenizing headlines (worth it at ~250 articles per
+# country; counting stays on the main process); 0 tokenizes on the main
+# process as fetches land
+ANALYSIS_WORKERS = 0
+
+# Spam headline patterns (matched against the lowercased headline)
+SPAM_PATTERNS = [
+    r'^\s*\d+\s*[:|]\s*\d+\s*[-–]\s*',  # Scores like "0:3 -" or "8:3 -"
+    r'sendung\s+im\s+tv\s*[-–]\s*programm',  # German TV program listings
+    r'tv\s*[-–]\s*programm',
+    r'^\s*archives?\s+des?\s+',  # Archive pages
+    r'^\s*morning\s+news\s+bulletin\s+\d+',  # Generic news bulletins
+]
+
+def build_trie_pattern(words):
+    """
+    Regex source matching any of `words` as a substring, with shared prefixes
+    factored into a trie so matching cost doesn't grow with the word count.
+    """
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[''] = {}  # End of word marker
+    
+    def to_pattern(node):
+        if '' in node:
+            # A word ends here; longer words sharing this prefix can't add a match
+            return ''
+        branches = [re.escape(char) + to_pattern(child) for char, child in sorted(node.items())]
+        if len(branches) == 1:
+            return branches[0]
+        return '(?:' + '|'.join(branches) + ')'
+    
+    return to_pattern(trie)
+
+class HeadlineFilter:
+    """
+    Blacklisted-source and spam-pattern matcher compiled once at startup:
+    all sources plus all spam rules become a single regex, so each headline
+    is scanned once no matter how large the blacklist grows.
+    """
+    
+    def __init__(self, headline_sources, spam_patterns=SPAM_PATTERNS):
+        self.enabled = bool(headline_sources)
+        alternatives = []
+        sources = [source.lower() for source in headline_sources if source]
+        if sources:
+            alternatives.append(build_trie_pattern(sources))
+        alternatives.extend(spam_patterns)
+        self.pattern = re.compile('|'.join(f'(?:{p})' for p in alternatives))
+    
+    def matches(self, headline):
+        """True if the headline should be filtered out"""
+        # Filtering (spam rules included) is only active with a source blacklist
+        if not self.enabled:
+            return False
+        return self.pattern.search(headline.lower()) is not None
+    
+    def mask(self, headlines):
+        """Batch version of matches(): one bool per headline"""
+        if not self.enabled:
+            return [False] * len(headlines)
+        search = self.pattern.search
+        return [search(headline.lower()) is not None for headline in headlines]
+
 # Load unified news blacklist
 def load_news_blacklist():
     """Load unified blacklist of news sources and words to filter out"""
@@ -239,13 +443,15 @@ def load_news_blacklist():
     try:
         with open(blacklist_file, 'r', encoding='utf-8') as f:
             data = json.load(f)
+            headline_sources = data.get('headline_sources', [])
             return {
-                'headline_sources': data.get('headline_sources', []),
-                'source_words': set(w.lower() for w in data.get('source_words', []))
+                'headline_sources': headline_sources,
+                'source_words': set(w.lower() for w in data.get('source_words', [])),
+                'headline_filter': HeadlineFilter(headline_sources)
             }
     except FileNotFoundError:
         print(f"[WARN] Blacklist file '{blacklist_file}' not found. No filtering will be applied.")
-        return {'headline_sources': [], 'source_words': set()}
+        return {'headline_sources': [], 'source_words': set(), 'headline_filter': HeadlineFilter([])}
 
 def should_filter_headline(headline, blacklist):
     """
@@ -255,153 +461,1001 @@ def should_filter_headline(headline, blacklist):
     if not blacklist or not blacklist.get('headline_sources'):
         return False
     
-    headline_lower = headline.lower()
-    
-    # Check blacklisted sources
-    for source in blacklist['headline_sources']:
-        if source.lower() in headline_lower:
-            return True
-    
-    # Additional spam patterns
-    spam_patterns = [
-        r'^\s*\d+\s*[:|]\s*\d+\s*[-–]\s*',  # Scores like "0:3 -" or "8:3 -"
-        r'sendung\s+im\s+tv\s*[-–]\s*programm',  # German TV program listings
-        r'tv\s*[-–]\s*programm',
-        r'^\s*archives?\s+des?\s+',  # Archive pages
-        r'^\s*morning\s+news\s+bulletin\s+\d+',  # Generic news bulletins
-    ]
-    
-    for pattern in spam_patterns:
-        if re.search(pattern, headline_lower):
-            return True
-    
-    return False
+    headline_filter = blacklist.get('headline_filter') or HeadlineFilter(blacklist['headline_sources'])
+    return headline_filter.matches(headline)
 
 # Load unified blacklist at startup
 NEWS_BLACKLIST = load_news_blacklist()
 
-def fetch_news_for_country(country_name, country_code, timespan='24h'):
-    """Fetch news from GDELT for a specific country"""
-    
-    timespan_label = timespan if timespan != '24h' else ''
-    print(f"Fetching news for {country_name}{' ('+timespan_label+')' if timespan_label else ''}...", end='', flush=True)
+@lru_cache(maxsize=None)
+def get_http_session(pool_size=FETCH_CONCURRENCY):
+    """requests Session whose keep-alive pool is shared by all worker threads (created on first use)"""
+    import requests
+    from requests.adapters import HTTPAdapter
     
-    # GDELT DOC API parameters
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+def build_gdelt_params(country_code, timespan='24h', window=None):
+    """
+    GDELT DOC API query parameters for one country, or for a batch when
+    `country_code` is a list of codes. A `window` of (startdatetime,
+    enddatetime) replaces the relative timespan.
+    """
     params = {
         'query': f'sourcecountry:{country_code}',
         'mode': 'artlist',
-        'maxrecords': MAX_ARTICLES_PER_COUNTRY,
+        'maxrecords': str(MAX_ARTICLES_PER_COUNTRY),
         'format': 'json',
         'timespan': timespan,  # Can be '24h', '7d', etc.
         'sort': 'datedesc'  # Most recent first
     }
+    if isinstance(country_code, (list, tuple)):
+        params['query'] = '(' + ' OR '.join(f'sourcecountry:{code}' for code in country_code) + ')'
+        params['maxrecords'] = str(BATCH_MAX_RECORDS)
+    if window:
+        del params['timespan']
+        params['startdatetime'], params['enddatetime'] = window
+        params['maxrecords'] = str(DEEP_MAX_RECORDS)
+    return params
+
+def parse_timespan(timespan):
+    """GDELT timespan such as '24h', '7d' or '2w' as a timedelta"""
+    match = re.fullmatch(r'(\d+)([hdw])', timespan)
+    if not match:
+        raise ValueError(f"Unsupported timespan: {timespan}")
+    unit = {'h': 'hours', 'd': 'days', 'w': 'weeks'}[match.group(2)]
+    return timedelta(**{unit: int(match.group(1))})
+
+def split_timespan(timespan, windows, now=None):
+    """
+    Split the last `timespan` into `windows` equal (startdatetime, enddatetime)
+    pairs, newest first. The end is floored to the hour so repeated runs issue
+    identical window queries (and hit the response cache) within that hour.
+    """
+    end = (now or datetime.now(timezone.utc)).replace(minute=0, second=0, microsecond=0)
+    step = parse_timespan(timespan) / windows
+    return [
+        ((end - step * (i + 1)).strftime('%Y%m%d%H%M%S'), (end - step * i).strftime('%Y%m%d%H%M%S'))
+        for i in range(windows)
+    ]
+
+def parse_gdelt_articles(raw_articles):
+    """
+    Convert raw GDELT article entries into our article dicts.
+    Returns (articles, filtered_count).
+    """
+    articles = []
+    filtered_count = 0
+    raw_articles = [article for article in raw_articles if article.get('title', '').strip()]
+    
+    # Filter out blacklisted sources and spam in one batch
+    filtered_mask = NEWS_BLACKLIST['headline_filter'].mask([article['title'] for article in raw_articles])
+    
+    for article, filtered in zip(raw_articles, filtered_mask):
+        if filtered:
+            filtered_count += 1
+            continue
+        
+        # Extract title and description
+        title = article.get('title', '')
+        seendate = article.get('seendate', '')
+        url = article.get('url', '')
+        domain = article.get('domain', '')
+        
+        # Only headlines are analyzed; the title is the text
+        articles.append({
+            'title': title,
+            'source': domain,
+            'date': seendate,
+            'url': url
+        })
+    
+    return articles, filtered_count
+
+def decode_gdelt_response(status_code, body):
+    """
+    Decode a raw GDELT DOC API response body.
+    Returns (raw_articles, error, retry) where raw_articles is None on failure
+    and retry is None, 'transient' or 'throttled'.
+    """
+    if status_code == 429:
+        return None, "HTTP 429", 'throttled'
+    if status_code != 200:
+        return None, f"HTTP {status_code}", 'transient' if status_code in RETRYABLE_STATUS_CODES else None
     
     try:
-        response = requests.get(GDELT_DOC_API, params=params, timeout=30)
+        data = json.loads(body)
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        # GDELT answers rate limiting with a plain-text notice instead of 429
+        if body[:64].lower().startswith(b'please limit requests'):
+            return None, "Rate limited", 'throttled'
+        # Any other non-JSON body (HTML error pages and the like) is a failed
+        # attempt: retried and never cached as "no articles"
+        return None, "Non-JSON response", 'transient'
+    if not isinstance(data, dict):
+        return None, "Unexpected JSON response", 'transient'
+    
+    return data.get('articles') or [], None, None
+
+def summarize_gdelt_articles(raw_articles, cached=False):
+    """
+    Filter raw GDELT entries into article dicts.
+    Returns (articles, status, message) where message is a short status for the log.
+    """
+    cache_label = " [cached]" if cached else ''
+    if not raw_articles:
+        return [], FETCH_EMPTY, f"0 articles{cache_label}"
+    
+    articles, filtered_count = parse_gdelt_articles(raw_articles)
+    status = FETCH_OK if articles else FETCH_EMPTY
+    if filtered_count > 0:
+        return articles, status, f"{len(articles)} articles ({filtered_count} filtered){cache_label}"
+    return articles, status, f"{len(articles)} articles{cache_label}"
+
+def parse_retry_after(value):
+    """Retry-After header in seconds (HTTP-date values are ignored)"""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+def format_fetch_log(country_name, timespan, message):
+    """One log line per finished request (safe to print from concurrent workers)"""
+    timespan_label = f" ({timespan})" if timespan != '24h' else ''
+    return f"{country_name}{timespan_label} -> {message}"
+
+def create_response_cache():
+    """Build the on-disk response cache, or None when caching is bypassed"""
+    if not USE_RESPONSE_CACHE:
+        return None
+    return ResponseCache(CACHE_DIR, CACHE_TTL, max_entries=CACHE_MAX_ENTRIES, max_age=CACHE_MAX_AGE)
+
+RESPONSE_CACHE = create_response_cache()
+
+# One throttle for the whole run so all workers back off together
+GDELT_THROTTLE = RequestThrottle(GDELT_RATE_LIMIT, GDELT_BURST)
+
+def finish_gdelt_attempt(params, raw_articles, error, retry, attempt):
+    """
+    Record one attempt with the throttle and decide what happens next.
+    Returns a final (raw_articles, error) pair (raw_articles is None on
+    failure), or None to retry.
+    """
+    # Only retryable failures (429/5xx/timeouts) signal load; a 404 does not
+    GDELT_THROTTLE.record(raw_articles is not None or retry is None, throttled=(retry == 'throttled'))
+    if raw_articles is not None:
+        if RESPONSE_CACHE:
+            RESPONSE_CACHE.put(params, raw_articles)
+        return raw_articles, None
+    if retry is None:
+        return None, error
+    if attempt >= FETCH_RETRIES:
+        return None, f"{error} (gave up after {attempt + 1} attempts)"
+    return None
+
+def fetch_gdelt_raw(params, session=None):
+    """
+    Blocking GDELT request over the pooled session, rate limited and retried
+    with jittered backoff. Returns (raw_articles, cached, error) with
+    raw_articles None when the request failed.
+    """
+    import requests
+    
+    # One pooled session for the whole run (avoids a TCP handshake per country)
+    session = session or get_http_session()
+    
+    # Raw (unfiltered) responses are cached so blacklist changes still apply
+    if RESPONSE_CACHE:
+        raw_articles = RESPONSE_CACHE.get(params)
+        if raw_articles is not None:
+            return raw_articles, True, None
+    
+    for attempt in range(FETCH_RETRIES + 1):
+        while (wait_seconds := GDELT_THROTTLE.acquire()) > 0:
+            time.sleep(wait_seconds)
+        retry_after = None
+        try:
+            response = session.get(GDELT_DOC_API, params=params, timeout=FETCH_TIMEOUT)
+            raw_articles, error, retry = decode_gdelt_response(response.status_code, response.content)
+            retry_after = parse_retry_after(response.headers.get('Retry-After'))
+        except requests.Timeout:
+            raw_articles, error, retry = None, "Timeout", 'transient'
+        except requests.ConnectionError as e:
+            raw_articles, error, retry = None, f"Connection error: {str(e)[:30]}", 'transient'
+        except Exception as e:
+            raw_articles, error, retry = None, f"Error: {str(e)[:30]}", None
         
-        if response.status_code == 200:
+        result = finish_gdelt_attempt(params, raw_articles, error, retry, attempt)
+        if result is not None:
+            return result[0], False, result[1]
+        time.sleep(backoff_delay(attempt, retry_after=retry_after))
+
+def request_gdelt_articles(country_code, timespan='24h', session=None, window=None):
+    """Fetch and filter one country's articles. Returns (articles, status, message)."""
+    raw_articles, cached, error = fetch_gdelt_raw(build_gdelt_params(country_code, timespan, window), session)
+    if raw_articles is None:
+        return [], FETCH_FAILED, error
+    return summarize_gdelt_articles(raw_articles, cached=cached)
+
+async def request_gdelt_articles_async(session, slots, country_code, timespan='24h'):
+    """
+    asyncio version of request_gdelt_articles using a shared aiohttp session.
+    `slots` is a semaphore bounding attempts in flight, so rate-limit waits
+    are only reserved for requests that are about to be sent.
+    """
+    import aiohttp
+    
+    params = build_gdelt_params(country_code, timespan)
+    
+    if RESPONSE_CACHE:
+        raw_articles = RESPONSE_CACHE.get(params)
+        if raw_articles is not None:
+            return summarize_gdelt_articles(raw_articles, cached=True)
+    
+    for attempt in range(FETCH_RETRIES + 1):
+        retry_after = None
+        async with slots:
+            while (wait_seconds := GDELT_THROTTLE.acquire()) > 0:
+                await asyncio.sleep(wait_seconds)
             try:
-                data = response.json()
-            except json.JSONDecodeError:
-                # GDELT sometimes returns HTML or other formats
-                print(f" -> JSON error (likely no data)")
-                return []
-            
-            if 'articles' in data and data['articles']:
-                articles = []
-                filtered_count = 0
-                for article in data['articles']:
-                    # Extract title and description
-                    title = article.get('title', '')
-                    seendate = article.get('seendate', '')
-                    url = article.get('url', '')
-                    domain = article.get('domain', '')
-                    
-                    if title.strip():
-                        # Filter out blacklisted sources and spam
-                        if should_filter_headline(title, NEWS_BLACKLIST):
-                            filtered_count += 1
-                            continue
-                        
-                        articles.append({
-                            'title': title,
-                            'text': title,  # Only analyze headlines
-                            'source': domain,
-                            'date': seendate,
-                            'url': url
-                        })
+                async with session.get(GDELT_DOC_API, params=params) as response:
+                    body = await response.read()
+                    raw_articles, error, retry = decode_gdelt_response(response.status, body)
+                    retry_after = parse_retry_after(response.headers.get('Retry-After'))
+            except asyncio.TimeoutError:
+                raw_articles, error, retry = None, "Timeout", 'transient'
+            except aiohttp.ClientConnectionError as e:
+                raw_articles, error, retry = None, f"Connection error: {str(e)[:30]}", 'transient'
+            except Exception as e:
+                raw_articles, error, retry = None, f"Error: {str(e)[:30]}", None
+        
+        result = finish_gdelt_attempt(params, raw_articles, error, retry, attempt)
+        if result is not None:
+            raw_articles, error = result
+            if raw_articles is None:
+                return [], FETCH_FAILED, error
+            return summarize_gdelt_articles(raw_articles)
+        await asyncio.sleep(backoff_delay(attempt, retry_after=retry_after))
+
+def fetch_news_for_country(country_name, country_code, timespan='24h'):
+    """Fetch news from GDELT for a specific country"""
+    articles, status, message = request_gdelt_articles(country_code, timespan)
+    print(f"Fetching news for {format_fetch_log(country_name, timespan, message)}")
+    return articles
+
+def collect_news_threaded(countries, escalation=None, concurrency=FETCH_CONCURRENCY, on_result=None):
+    """
+    Fetch many countries with a thread pool, escalating each country through
+    `escalation` independently: an empty result immediately queues that
+    country's next timespan, so workers never wait on a pass barrier.
+    Failed requests (after retries) end the chain instead of escalating.
+    `on_result(country_name, articles, timespan)` runs on the calling thread
+    as each country lands, while the workers keep fetching.
+    Returns ({country_name: articles}, {country_name: timespan}, {country_name: error}).
+    """
+    escalation = escalation or TIMESPAN_ESCALATION
+    results = {}
+    timeframes = {}
+    failures = {}
+    total = len(countries)
+    finished = 0
+    
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        pending = {
+            executor.submit(request_gdelt_articles, country_code, escalation[0]): (country_name, 0)
+            for country_name, country_code in countries.items()
+        }
+        
+        # Process results as they complete
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                country_name, step = pending.pop(future)
+                timespan = escalation[step]
+                try:
+                    articles, status, message = future.result()
+                except Exception as e:
+                    articles, status, message = [], FETCH_FAILED, f"Exception: {str(e)[:30]}"
                 
-                if filtered_count > 0:
-                    print(f" -> {len(articles)} articles ({filtered_count} filtered)")
-                else:
-                    print(f" -> {len(articles)} articles")
-                return articles
-            else:
-                print(f" -> 0 articles")
-                return []
+                if status == FETCH_OK:
+                    results[country_name] = articles
+                    timeframes[country_name] = timespan
+                    if on_result:
+                        on_result(country_name, articles, timespan)
+                elif status == FETCH_FAILED:
+                    # Transient failures were already retried; a longer timespan won't help
+                    failures[country_name] = message
+                elif step + 1 < len(escalation):
+                    # No data yet - try this country's next timespan right away
+                    next_future = executor.submit(request_gdelt_articles, countries[country_name], escalation[step + 1])
+                    pending[next_future] = (country_name, step + 1)
+                    print(f"        {format_fetch_log(country_name, timespan, message)}, trying {escalation[step + 1]}")
+                    continue
+                
+                finished += 1
+                print(f"[{finished}/{total}] {format_fetch_log(country_name, timespan, message)}")
+    
+    return results, timeframes, failures
+
+async def collect_news_async(countries, escalation=None, concurrency=FETCH_CONCURRENCY, timeout=FETCH_TIMEOUT,
+                             on_result=None):
+    """
+    Fetch many countries on a single event loop, escalating each country
+    through `escalation` independently. All requests share one pooled
+    keep-alive connector capped at `concurrency` connections; `timeout`
+    applies to each request. Failed requests end the chain instead of escalating.
+    `on_result(country_name, articles, timespan)` runs on the loop as each
+    country lands, between awaits of the requests still in flight.
+    Returns ({country_name: articles}, {country_name: timespan}, {country_name: error}).
+    """
+    import aiohttp
+    
+    escalation = escalation or TIMESPAN_ESCALATION
+    results = {}
+    timeframes = {}
+    failures = {}
+    total = len(countries)
+    finished = 0
+    connector = aiohttp.TCPConnector(limit=concurrency, limit_per_host=concurrency)
+    client_timeout = aiohttp.ClientTimeout(total=timeout)
+    
+    slots = asyncio.Semaphore(concurrency)
+    
+    async with aiohttp.ClientSession(connector=connector, timeout=client_timeout) as session:
+        async def fetch_chain(country_name, country_code):
+            nonlocal finished
+            for step, timespan in enumerate(escalation):
+                articles, status, message = await request_gdelt_articles_async(session, slots, country_code, timespan)
+                if status == FETCH_OK:
+                    results[country_name] = articles
+                    timeframes[country_name] = timespan
+                    if on_result:
+                        on_result(country_name, articles, timespan)
+                    break
+                if status == FETCH_FAILED:
+                    failures[country_name] = message
+                    break
+                if step + 1 < len(escalation):
+                    print(f"        {format_fetch_log(country_name, timespan, message)}, trying {escalation[step + 1]}")
+            finished += 1
+            print(f"[{finished}/{total}] {format_fetch_log(country_name, timespan, message)}")
+        
+        await asyncio.gather(*(fetch_chain(country_name, country_code)
+                               for country_name, country_code in countries.items()))
+    
+    return results, timeframes, failures
+
+def collect_news_deep(countries, results, timeframes, concurrency=FETCH_CONCURRENCY, on_result=None):
+    """
+    Deepen every country in `results` by re-querying its timeframe as
+    DEEP_WINDOWS sub-windows, newest first with DEEP_PARALLEL_WINDOWS in flight
+    per country. New articles are deduped by URL; a country stops early once a
+    window's words are less than DEEP_SATURATION new to it. Replaces the
+    entries of `results` in place and returns the number of window requests.
+    Each headline is split once: `on_result` also gets `headline_splits`
+    ({title: split_headline(title)}), so the corpus doesn't split it again.
+    """
+    windows = {timespan: split_timespan(timespan, DEEP_WINDOWS) for timespan in set(timeframes.values())}
+    
+    def headline_words(country, articles):
+        """The countable words of `articles`, keeping each split headline"""
+        words = set()
+        for article in articles:
+            tokens = country['splits'].get(article['title'])
+            if tokens is None:
+                tokens = country['splits'][article['title']] = split_headline(article['title'])
+            words.update(countable_words(tokens, detect_language(tokens)))
+        return words
+    
+    state = {}
+    for country_name, articles in results.items():
+        state[country_name] = {
+            'articles': list(articles),
+            'urls': {article['url'] or article['title'] for article in articles},
+            'splits': {},
+            'next_window': 0,
+            'in_flight': 0,
+            'saturated': False,
+        }
+        state[country_name]['vocabulary'] = headline_words(state[country_name], articles)
+    total = len(state)
+    finished = 0
+    requests_made = 0
+    
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        pending = {}
+        
+        def submit_next(country_name):
+            nonlocal requests_made
+            country = state[country_name]
+            window = windows[timeframes[country_name]][country['next_window']]
+            future = executor.submit(request_gdelt_articles, countries[country_name], window=window)
+            pending[future] = country_name
+            country['next_window'] += 1
+            country['in_flight'] += 1
+            requests_made += 1
+        
+        for country_name in state:
+            for _ in range(min(DEEP_PARALLEL_WINDOWS, DEEP_WINDOWS)):
+                submit_next(country_name)
+        
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                country_name = pending.pop(future)
+                country = state[country_name]
+                country['in_flight'] -= 1
+                try:
+                    articles, status, message = future.result()
+                except Exception:
+                    articles = []
+                
+                new_articles = []
+                for article in articles:
+                    key = article['url'] or article['title']
+                    if key not in country['urls']:
+                        country['urls'].add(key)
+                        new_articles.append(article)
+                
+                if new_articles:
+                    window_words = headline_words(country, new_articles)
+                    new_words = window_words - country['vocabulary']
+                    country['vocabulary'] |= window_words
+                    country['articles'].extend(new_articles)
+                    if window_words and len(new_words) / len(window_words) < DEEP_SATURATION:
+                        country['saturated'] = True
+                
+                if not country['saturated'] and country['next_window'] < DEEP_WINDOWS:
+                    submit_next(country_name)
+                elif country['in_flight'] == 0:
+                    finished += 1
+                    results[country_name] = country['articles']
+                    print(f"[{finished}/{total}] {country_name}: {len(country['articles'])} articles "
+                          f"from {country['next_window']} windows{' (saturated)' if country['saturated'] else ''}")
+                    if on_result:
+                        on_result(country_name, results[country_name], timeframes[country_name],
+                                  headline_splits=country['splits'])
+    
+    return requests_made
+
+def normalize_country_name(name):
+    return re.sub(r'[^a-z]', '', name.lower())
+
+def build_country_lookup(countries):
+    """Map GDELT's sourcecountry values (full names or FIPS codes) back to our country names"""
+    lookup = {normalize_country_name(country_name): country_name for country_name in countries}
+    lookup.update({normalize_country_name(alias): country_name
+                   for alias, country_name in SOURCE_COUNTRY_ALIASES.items() if country_name in countries})
+    lookup.update({country_code.lower(): country_name for country_name, country_code in countries.items()})
+    return lookup
+
+def split_batch_articles(raw_articles, batch, lookup):
+    """
+    Attribute a batch response to its countries: by the article's
+    sourcecountry, else by a domain already seen from one country of the batch.
+    A one-country batch gets every article without a lookup.
+    Returns {country_name: [raw_article, ...]}; unplaceable articles are dropped.
+    """
+    if len(batch) == 1:
+        return {batch[0]: list(raw_articles)}
+    by_country = {country_name: [] for country_name in batch}
+    domains = {}
+    unplaced = []
+    for article in raw_articles:
+        country_name = lookup.get(normalize_country_name(article.get('sourcecountry', '')))
+        if country_name in by_country:
+            by_country[country_name].append(article)
+            domains.setdefault(article.get('domain'), country_name)
         else:
-            print(f" -> HTTP {response.status_code}")
-            return []
+            unplaced.append(article)
+    for article in unplaced:
+        country_name = domains.get(article.get('domain'))
+        if country_name:
+            by_country[country_name].append(article)
+    return by_country
+
+def collect_news_batched(countries, escalation=None, concurrency=FETCH_CONCURRENCY, on_result=None):
+    """
+    Fetch countries in batches of OR-combined sourcecountry: queries, one
+    timespan of `escalation` at a time, running each wave of batches in
+    parallel. A country is done once it has MAX_ARTICLES_PER_COUNTRY
+    articles, or any articles from a response under the record cap. From a
+    capped response, under-supplied countries are re-queued in smaller batches;
+    countries with nothing in an uncapped response move to the next timespan.
+    Countries whose batch request failed are left for per-country queries.
+    Returns ({country_name: articles}, {country_name: timespan}, [unresolved country_name], requests made).
+    """
+    escalation = escalation or TIMESPAN_ESCALATION
+    lookup = build_country_lookup(countries)
+    results = {}
+    timeframes = {}
+    unresolved = []
+    batch_size = BATCH_SIZE
+    requests_made = 0
+    
+    queue = list(countries)
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for step, timespan in enumerate(escalation):
+            empty = []
+            while queue:
+                batches = [queue[i:i + batch_size] for i in range(0, len(queue), batch_size)]
+                futures = {
+                    executor.submit(fetch_gdelt_raw, build_gdelt_params([countries[name] for name in batch], timespan)): batch
+                    for batch in batches
+                }
+                requests_made += len(futures)
+                queue = []
+                capped = 0
+                fill = []
+                
+                for future, batch in futures.items():
+                    raw_articles, cached, error = future.result()
+                    if raw_articles is None:
+                        unresolved.extend(batch)
+                        print(f"        Batch of {len(batch)} ({timespan}): {error}, retrying per country")
+                        continue
+                    
+                    is_capped = len(raw_articles) >= BATCH_MAX_RECORDS
+                    capped += is_capped
+                    fill.append(len(raw_articles) / BATCH_MAX_RECORDS)
+                    for country_name, country_raw in split_batch_articles(raw_articles, batch, lookup).items():
+                        articles, _ = parse_gdelt_articles(country_raw)
+                        articles = articles[:MAX_ARTICLES_PER_COUNTRY]
+                        if len(articles) >= MAX_ARTICLES_PER_COUNTRY or (articles and (not is_capped or len(batch) == 1)):
+                            results[country_name] = articles
+                            timeframes[country_name] = timespan
+                            print(f"[{len(results)}/{len(countries)}] {format_fetch_log(country_name, timespan, f'{len(articles)} articles [batch]')}")
+                            if on_result:
+                                on_result(country_name, articles, timespan)
+                        elif is_capped and len(batch) > 1:
+                            queue.append(country_name)
+                        else:
+                            empty.append(country_name)
+                
+                # Adapt the batch size to how full the responses came back
+                if capped:
+                    batch_size = max(1, batch_size // 2)
+                elif fill and sum(fill) / len(fill) < 0.5:
+                    batch_size = min(BATCH_MAX_SIZE, batch_size * 2)
             
-    except requests.Timeout:
-        print(f" -> Timeout")
-        return []
-    except Exception as e:
-        print(f" -> Error: {str(e)[:30]}")
-        return []
+            queue = empty
+            if queue and step + 1 < len(escalation):
+                print(f"        {len(queue)} countries with no {timespan} articles, trying {escalation[step + 1]}")
+    
+    # Countries the batches never placed get the regular per-country fallback
+    unresolved.extend(queue)
+    return results, timeframes, unresolved, requests_made
 
-def get_word_frequency(texts):
-    """Analyze text and return word frequencies (counting unique articles, not total occurrences)"""
+def collect_news(countries, escalation=None, on_result=None):
+    """
+    Fetch every country, falling back through the timespans in `escalation`
+    (default TIMESPAN_ESCALATION) using the best available engine.
+    `on_result(country_name, articles, timespan)` is called as each country's
+    articles arrive, so analysis can start before the last fetch finishes.
+    With DEEP_COLLECTION, countries are handed over after their deep pass,
+    with the headlines it already split as `headline_splits`.
+    Returns ({country_name: articles}, {country_name: timespan}, {country_name: error}).
+    """
+    first_pass_callback = None if DEEP_COLLECTION else on_result
+    if BATCH_COLLECTION:
+        batch_results, batch_timeframes, unresolved, requests_made = collect_news_batched(
+            countries, escalation, on_result=first_pass_callback)
+        print(f"\nBatch collection: {len(batch_results)} countries from {requests_made} requests, "
+              f"{len(unresolved)} left for per-country queries\n")
+        remaining = {country_name: countries[country_name] for country_name in unresolved}
+    else:
+        remaining = countries
     
-    if USE_NLTK:
-        stop_words = set(stopwords.words('english'))
+    if USE_ASYNC_FETCH and USE_AIOHTTP:
+        collected = asyncio.run(collect_news_async(remaining, escalation, on_result=first_pass_callback))
     else:
-        # Basic English stop words
-        stop_words = set(['the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for',
-                         'of', 'with', 'by', 'from', 'as', 'is', 'was', 'are', 'were', 'be',
-                         'been', 'being', 'have', 'has', 'had', 'do', 'does', 'did', 'will',
-                         'would', 'could', 'should', 'may', 'might', 'can', 'it', 'its', 'this',
-                         'that', 'these', 'those', 'i', 'you', 'he', 'she', 'we', 'they', 'what',
-                         'which', 'who', 'when', 'where', 'why', 'how', 'said', 'says', 'after',
-                         'over', 'up', 'down', 'out', 'off', 'into', 'than', 'their', 'them'])
+        collected = collect_news_threaded(remaining, escalation, on_result=first_pass_callback)
+    
+    if BATCH_COLLECTION:
+        batch_results.update(collected[0])
+        batch_timeframes.update(collected[1])
+        collected = (batch_results, batch_timeframes, collected[2])
+    
+    if DEEP_COLLECTION:
+        results, timeframes, failures = collected
+        print(f"\nDEEP COLLECTION: up to {DEEP_WINDOWS} windows x {DEEP_MAX_RECORDS} articles per country\n")
+        requests_made = collect_news_deep(countries, results, timeframes, on_result=on_result)
+        print(f"\nDeep collection: {requests_made} window requests")
+    
+    if RESPONSE_CACHE:
+        removed = RESPONSE_CACHE.prune()
+        print(f"\nResponse cache: {RESPONSE_CACHE.hits} hits, {RESPONSE_CACHE.misses} misses"
+              f"{f', {removed} evicted' if removed else ''}")
+    if GDELT_THROTTLE.breaker.trips:
+        print(f"Circuit breaker tripped {GDELT_THROTTLE.breaker.trips} time(s); "
+              f"final rate {GDELT_THROTTLE.bucket.rate:.1f} req/s")
+    return collected
+
+# Basic English stop words (used when NLTK is unavailable)
+BASIC_STOP_WORDS = {'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for',
+                    'of', 'with', 'by', 'from', 'as', 'is', 'was', 'are', 'were', 'be',
+                    'been', 'being', 'have', 'has', 'had', 'do', 'does', 'did', 'will',
+                    'would', 'could', 'should', 'may', 'might', 'can', 'it', 'its', 'this',
+                    'that', 'these', 'those', 'i', 'you', 'he', 'she', 'we', 'they', 'what',
+                    'which', 'who', 'when', 'where', 'why', 'how', 'said', 'says', 'after',
+                    'over', 'up', 'down', 'out', 'off', 'into', 'than', 'their', 'them'}
+
+# Headline cleanup patterns (compiled once)
+URL_PATTERN = re.compile(r'http\S+|www\S+')
+APOSTROPHES = str.maketrans({'\u2019': "'", '\u02bc': "'"})
+POSSESSIVE_PATTERN = re.compile(r"'s$")
+ELISION_PATTERN = re.compile(r"^(?:l|d|j|m|n|s|t|c|qu)'(?=\w)")  # French/Italian l', d', qu'...
+
+# Scripts that need special handling, as (first code point, last code point, script)
+SCRIPT_RANGES = sorted([
+    (0x0590, 0x05FF, 'hebrew'),
+    (0x0600, 0x06FF, 'arabic'),
+    (0x0750, 0x077F, 'arabic'),
+    (0x08A0, 0x08FF, 'arabic'),
+    (0x1100, 0x11FF, 'hangul'),
+    (0x3040, 0x30FF, 'cjk'),     # Hiragana and Katakana
+    (0x3130, 0x318F, 'hangul'),
+    (0x3400, 0x4DBF, 'cjk'),
+    (0x4E00, 0x9FFF, 'cjk'),
+    (0xAC00, 0xD7AF, 'hangul'),
+    (0xF900, 0xFAFF, 'cjk'),
+])
+SCRIPT_RANGE_STARTS = [start for start, _, _ in SCRIPT_RANGES]
+
+# Minimum word length per script (Semitic roots and Hangul syllables are short)
+MIN_WORD_LENGTH = {'default': 4, 'arabic': 3, 'hebrew': 3, 'hangul': 2}
+
+# Scripts written without spaces: split into overlapping character bigrams
+# (Thai/Lao/Khmer/Myanmar runs are kept whole - there is no cheap segmentation)
+UNSEGMENTED_SCRIPTS = {'cjk'}
+
+def get_script(char):
+    """Script of one character, 'default' unless it needs special handling"""
+    code = ord(char)
+    idx = bisect.bisect_right(SCRIPT_RANGE_STARTS, code) - 1
+    if idx >= 0 and code <= SCRIPT_RANGES[idx][1]:
+        return SCRIPT_RANGES[idx][2]
+    return 'default'
+
+@lru_cache(maxsize=None)
+def get_word_pattern():
+    """
+    Unicode word tokenizer: runs of letters (any script) plus their combining
+    marks, so accented Latin and Indic words stay whole. Compiled on first use.
+    """
+    marks = []
+    for code in range(0x300, 0x10000):
+        if unicodedata.category(chr(code)) in ('Mn', 'Mc', 'Me'):
+            if marks and marks[-1][1] == code - 1:
+                marks[-1][1] = code
+            else:
+                marks.append([code, code])
+    mark_class = ''.join(re.escape(chr(start)) + ('-' + re.escape(chr(end)) if end > start else '')
+                         for start, end in marks)
+    letter = rf"[^\W\d_][{mark_class}]*"
+    return re.compile(rf"(?:{letter})+(?:'(?:{letter})+)*")
+
+def load_nltk_stopwords():
+    """NLTK's stopwords corpus as {language: words}, or None if NLTK or its data is unavailable"""
+    try:
+        import nltk
+        from nltk.corpus import stopwords
+    except ImportError:
+        print("[WARN] NLTK not installed, using bundled stop words")
+        return None
+    
+    try:
+        nltk.data.find('corpora/stopwords')
+    except LookupError:
+        if not nltk.download('stopwords', quiet=True):
+            print("[WARN] NLTK stopwords could not be downloaded, using bundled stop words")
+            return None
+    return {language: frozenset(stopwords.words(language)) for language in stopwords.fileids()}
+
+def load_stopword_pack():
+    """Bundled stop word pack as {language: words} (basic English list if the file is missing)"""
+    try:
+        with open(STOPWORDS_FILE, 'r', encoding='utf-8') as f:
+            return {language: frozenset(words) for language, words in json.load(f)['languages'].items()}
+    except (OSError, ValueError, KeyError):
+        print(f"[WARN] Stop word pack '{STOPWORDS_FILE}' not found, using basic English stop words")
+        return {'english': frozenset(BASIC_STOP_WORDS)}
+
+@lru_cache(maxsize=None)
+def get_stopword_lists():
+    """{language: stop words} from the configured source, loaded on first use"""
+    return (USE_NLTK and load_nltk_stopwords()) or load_stopword_pack()
+
+def get_stop_words(language='english'):
+    """Stop words for one language (NLTK corpus name)"""
+    return get_stopword_lists().get(language, frozenset())
+
+@lru_cache(maxsize=None)
+def get_stopword_index():
+    """Map each stop word to the languages it belongs to (for language detection)"""
+    index = {}
+    for language, words in get_stopword_lists().items():
+        for word in words:
+            index.setdefault(word, []).append(language)
+    return index
+
+@lru_cache(maxsize=None)
+def get_excluded_words(language):
+    """Words never counted for a headline in `language`: its stop words, English ones and news source names"""
+    excluded = get_stop_words('english') | NEWS_BLACKLIST['source_words']
+    if language and language != 'english':
+        excluded = excluded | get_stop_words(language)
+    return frozenset(excluded)
+
+def detect_language(tokens, default=None, margin=LANGUAGE_VOTE_MARGIN):
+    """
+    Cheap language guess: the language whose stop words the tokens use most,
+    if it leads the runner-up by `margin` votes, else `default` (so one shared
+    stop word like "hit" or "door" doesn't make an English headline Swedish)
+    """
+    index = get_stopword_index()
+    votes = Counter()
+    for token in tokens:
+        for language in index.get(token, ()):
+            votes[language] += 1
+    ranked = votes.most_common(2)
+    if not ranked:
+        return default
+    lead = ranked[0][1] - (ranked[1][1] if len(ranked) > 1 else 0)
+    return ranked[0][0] if lead >= margin else default
+
+def split_headline(text):
+    """Lowercased word tokens of one headline (URLs removed, apostrophes normalized)"""
+    text = URL_PATTERN.sub('', text.lower().translate(APOSTROPHES))
+    tokens = []
+    for token in get_word_pattern().findall(text):
+        token = ELISION_PATTERN.sub('', POSSESSIVE_PATTERN.sub('', token))
+        if token:
+            tokens.append(token)
+    return tokens
+
+def countable_words(tokens, language):
+    """
+    The words of one split headline that are counted, each once, in order of
+    first appearance (so counts and tie-breaks don't depend on set hash order)
+    """
+    excluded_words = get_excluded_words(language)
+    unique_words = {}
+    for word in tokens:
+        script = get_script(word[0])
+        if script in UNSEGMENTED_SCRIPTS:
+            unique_words.update(dict.fromkeys(word[i:i + 2] for i in range(len(word) - 1)))
+        elif (len(word) >= MIN_WORD_LENGTH.get(script, MIN_WORD_LENGTH['default']) and
+              word not in excluded_words):  # Stop words and news source names
+            unique_words[word] = None
+    return list(unique_words)
+
+def tokenize_headline(text, default_language=None):
+    """Return the countable words in one headline (default_language when its language is unclear)"""
+    tokens = split_headline(text)
+    return countable_words(tokens, detect_language(tokens, default_language))
+
+def get_headline_tokens(texts):
+    """
+    tokenize_headline() for each text of one country (one task per country in
+    the process pool); headlines whose language is unclear take the language
+    of all the texts together
+    """
+    return get_split_headline_tokens([split_headline(text) for text in texts])
+
+def get_split_headline_tokens(split):
+    """get_headline_tokens() for headlines already run through split_headline()"""
+    default_language = detect_language([token for tokens in split for token in tokens])
+    return [countable_words(tokens, detect_language(tokens, default_language)) for tokens in split]
+
+def get_word_frequency(texts):
+    """Analyze text and return word frequencies (counting unique articles, not total occurrences)"""
     
     # Count how many UNIQUE articles contain each word (not total occurrences)
     word_article_count = Counter()
     
     for text in texts:
-        # Clean text
-        text = text.lower()
-        # Remove URLs
-        text = re.sub(r'http\S+|www\S+', '', text)
-        # Remove special characters but keep letters and apostrophes
-        text = re.sub(r'[^a-z\s\']', ' ', text)
-        # Remove extra apostrophes
-        text = re.sub(r'\'s\b', '', text)
-        
-        # Tokenize
-        if USE_NLTK:
-            try:
-                words = word_tokenize(text)
-            except:
-                words = text.split()
+        # Count each word once per article
+        word_article_count.update(tokenize_headline(text))
+    
+    return word_article_count
+
+@lru_cache(maxsize=None)
+def get_near_duplicate_detector():
+    return NearDuplicateDetector(threshold=NEAR_DUPLICATE_THRESHOLD)
+
+def collapse_near_duplicates(articles):
+    """Keep the first article of each near-duplicate headline cluster"""
+    if len(articles) < 2:
+        return articles
+    labels = get_near_duplicate_detector().clusters([article['title'] for article in articles])
+    return [article for idx, (article, label) in enumerate(zip(articles, labels)) if label == idx]
+
+def cross_country_duplicate_counts(corpus, country_articles):
+    """
+    Per-term counts to subtract from corpus.global_counts() so a story carried
+    in several countries counts once globally. Headlines are clustered in a
+    fixed order (country, then title), so the result doesn't depend on which
+    fetch finished first. In each cluster a word found in n of its headlines
+    is counted only as often as the one country using it most, which keeps
+    every country's global count at or above its local count.
+    Returns (counts aligned with corpus.vocabulary, number of copies).
+    """
+    entries = sorted(
+        (country_name, article['title'], corpus.article_offsets[corpus.country_rows[country_name]] + position)
+        for country_name, articles in country_articles.items()
+        for position, article in enumerate(articles)
+    )
+    labels = get_near_duplicate_detector().clusters([title for _, title, _ in entries])
+    copies = np.flatnonzero(labels != np.arange(len(labels)))
+    
+    clusters = {}
+    for idx in copies.tolist():
+        clusters.setdefault(int(labels[idx]), [int(labels[idx])]).append(idx)
+    
+    counts = np.zeros(len(corpus.vocabulary), dtype=np.int64)
+    for members in clusters.values():
+        in_headlines = Counter()
+        by_country = Counter()
+        for idx in members:
+            country_name, _, article_idx = entries[idx]
+            start, end = corpus.article_indptr[article_idx], corpus.article_indptr[article_idx + 1]
+            term_ids = corpus.article_terms[start:end].tolist()
+            in_headlines.update(term_ids)
+            by_country.update((country_name, term_id) for term_id in term_ids)
+        most_in_one_country = {}
+        for (_, term_id), count in by_country.items():
+            most_in_one_country[term_id] = max(most_in_one_country.get(term_id, 0), count)
+        for term_id, count in in_headlines.items():
+            counts[term_id] += count - most_in_one_country[term_id]
+    return counts, len(copies)
+
+class WordCorpus:
+    """
+    All headlines tokenized once: a vocabulary plus a sparse country x term
+    matrix of document frequencies (how many of a country's articles contain
+    each word), stored as CSR arrays. Global counts are column sums and a
+    country's counts are its row, so nothing is tokenized twice. Each
+    article's term ids are kept too (another CSR, articles in row order) so
+    headlines can be looked up by word without re-scanning them.
+    """
+    
+    def __init__(self, countries, vocabulary, indptr, indices, counts, num_articles,
+                 article_indptr, article_terms):
+        self.countries = countries          # Row labels
+        self.vocabulary = vocabulary        # Column labels (term id -> word)
+        self.indptr = indptr                # Row i spans indices[indptr[i]:indptr[i+1]]
+        self.indices = indices              # Term ids
+        self.counts = counts                # Article counts per (country, term)
+        self.num_articles = num_articles    # Articles per country
+        self.article_indptr = article_indptr  # Article j spans article_terms[article_indptr[j]:article_indptr[j+1]]
+        self.article_terms = article_terms    # Term ids of each article's headline
+        self.article_offsets = np.concatenate(([0], np.cumsum(num_articles)))  # Row i's articles
+        self.country_rows = {country_name: row_idx for row_idx, country_name in enumerate(countries)}
+    
+    def global_counts(self):
+        """Articles containing each term across all countries (column sums)"""
+        return np.bincount(self.indices, weights=self.counts, minlength=len(self.vocabulary)).astype(np.int64)
+    
+    def row_ids(self):
+        """Row (country) index of every stored entry, aligned with indices/counts"""
+        return np.repeat(np.arange(len(self.countries)), np.diff(self.indptr))
+    
+    def local_percentages(self):
+        """Share (%) of a country's articles containing each term, aligned with indices"""
+        return (self.counts / self.num_articles[self.row_ids()]) * 100
+    
+    def row(self, row_idx):
+        """(term_ids, counts) for one country"""
+        start, end = self.indptr[row_idx], self.indptr[row_idx + 1]
+        return self.indices[start:end], self.counts[start:end]
+    
+    def headline_postings(self, row_idx, term_ids):
+        """For each term id, the positions (within the country's articles) of the headlines containing it"""
+        first, last = self.article_offsets[row_idx], self.article_offsets[row_idx + 1]
+        spans = self.article_indptr[first:last + 1]
+        terms = self.article_terms[spans[0]:spans[-1]]
+        articles = np.repeat(np.arange(last - first), np.diff(spans))
+        return [articles[terms == term_id] for term_id in term_ids]
+    
+    def headline_words(self, country_name):
+        """Each of a country's headlines as its list of words (what tokenize_headline returned)"""
+        row_idx = self.country_rows[country_name]
+        spans = self.article_indptr[self.article_offsets[row_idx]:self.article_offsets[row_idx + 1] + 1]
+        vocabulary = self.vocabulary
+        return [[vocabulary[term_id] for term_id in self.article_terms[start:end].tolist()]
+                for start, end in zip(spans[:-1].tolist(), spans[1:].tolist())]
+    
+    def country_word_freq(self, country_name):
+        """One country's counts as a Counter, like get_word_frequency on its texts"""
+        term_ids, counts = self.row(self.country_rows[country_name])
+        return Counter({self.vocabulary[term_id]: int(count) for term_id, count in zip(term_ids, counts)})
+
+class CorpusBuilder:
+    """
+    Builds a WordCorpus one country at a time, so headlines can be tokenized
+    (and, without a pool, counted) as each fetch completes instead of after
+    collection ends.
+    With an `executor` (a process pool), each country's headlines are
+    tokenized in a worker (get_headline_tokens); build() then counts the
+    returned token lists in arrival order, matching the serial path.
+    """
+    
+    def __init__(self, executor=None):
+        self.executor = executor
+        self.pending = []
+        self.term_ids = {}
+        self.vocabulary = []
+        self.countries = []
+        self.indptr = [0]
+        self.indices = []
+        self.counts = []
+        self.num_articles = []
+        self.article_indptr = [0]
+        self.article_terms = []
+    
+    def add_country(self, country_name, articles, timespan=None, headline_splits=None):
+        """
+        Tokenize and count one country's headlines, or queue them for a worker
+        (usable as a collect_news on_result callback). `headline_splits`
+        ({title: split_headline(title)}) skips splitting headlines again.
+        """
+        if headline_splits is None:
+            tokenize, texts = get_headline_tokens, [article['title'] for article in articles]
+        else:
+            tokenize, texts = get_split_headline_tokens, [headline_splits[article['title']] for article in articles]
+        if self.executor:
+            self.pending.append((country_name, self.executor.submit(tokenize, texts)))
         else:
-            words = text.split()
+            self.add_tokens(country_name, tokenize(texts))
+    
+    def add_tokens(self, country_name, headline_tokens):
+        """Append one country's row from its headlines' token lists"""
+        country_counts = Counter()
+        for tokens in headline_tokens:
+            country_counts.update(tokens)
         
-        # Get unique words in this article
-        unique_words = set()
-        for word in words:
-            word = word.strip("'")
-            if (len(word) > 3 and  # At least 4 characters
-                word not in stop_words and
-                word not in NEWS_BLACKLIST['source_words'] and  # Filter out news source names
-                not word.isdigit()):
-                unique_words.add(word)
+        for word, count in country_counts.items():
+            term_id = self.term_ids.get(word)
+            if term_id is None:
+                term_id = self.term_ids[word] = len(self.vocabulary)
+                self.vocabulary.append(word)
+            self.indices.append(term_id)
+            self.counts.append(count)
+        self.indptr.append(len(self.indices))
+        self.num_articles.append(len(headline_tokens))
+        self.countries.append(country_name)
         
-        # Count each word once per article
-        for word in unique_words:
-            word_article_count[word] += 1
+        for tokens in headline_tokens:
+            self.article_terms.extend(self.term_ids[word] for word in tokens)
+            self.article_indptr.append(len(self.article_terms))
     
-    return word_article_count
+    def build(self):
+        for country_name, future in self.pending:
+            self.add_tokens(country_name, future.result())
+        self.pending = []
+        
+        return WordCorpus(
+            list(self.countries),
+            self.vocabulary,
+            np.array(self.indptr, dtype=np.int64),
+            np.array(self.indices, dtype=np.int64),
+            np.array(self.counts, dtype=np.int64),
+            np.array(self.num_articles, dtype=np.int64),
+            np.array(self.article_indptr, dtype=np.int64),
+            np.array(self.article_terms, dtype=np.int32),
+        )
+
+def build_corpus(country_articles):
+    """Tokenize every country's headlines once into a WordCorpus"""
+    builder = CorpusBuilder()
+    for country_name, articles in country_articles.items():
+        builder.add_country(country_name, articles)
+    return builder.build()
 
 def calculate_prevalence_score(word, country_freq, global_freq, num_articles):
     """Calculate how prevalent a word is locally vs globally"""
@@ -417,270 +1471,370 @@ def calculate_prevalence_score(word, country_freq, global_freq, num_articles):
     
     return score, local_pct
 
-def main():
-    print("="*80)
-    print("WORLD'S MOOD - NEWS ANALYSIS (GDELT Project)")
-    print("="*80)
-    print(f"\nStarted at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-    print(f"Countries to analyze: {len(COUNTRIES)}")
-    print(f"Max articles per country: {MAX_ARTICLES_PER_COUNTRY}")
-    print(f"Timeframe: Last 24 hours")
-    print(f"No rate limits - Unlimited queries!")
-    if NEWS_BLACKLIST['headline_sources']:
-        print(f"Headline filtering: ENABLED ({len(NEWS_BLACKLIST['headline_sources'])} sources blacklisted)")
-    else:
-        print(f"Headline filtering: DISABLED")
-    if NEWS_BLACKLIST['source_words']:
-        print(f"Word filtering: ENABLED ({len(NEWS_BLACKLIST['source_words'])} news source words blacklisted)")
-    else:
-        print(f"Word filtering: DISABLED")
-    print("\n" + "="*80 + "\n")
-    
-    # FIRST PASS: Collect articles from last 24 hours
-    all_country_data = {}
-    all_articles_text = []
-    missing_countries = {}  # Track countries with no data for second pass
-    country_timeframe = {}  # Track which timeframe was used for each country
-    
-    total_countries = len(COUNTRIES)
-    completed = 0
-    
-    print("FIRST PASS: Last 24 hours\n")
+def calculate_prevalence_scores(corpus, global_counts):
+    """
+    calculate_prevalence_score for every (country, term) entry of the corpus
+    in one array op. Returns (scores, local_pcts) aligned with corpus.indices.
+    """
+    local_pct = corpus.local_percentages()
+    global_rarity = 1.0 / (global_counts[corpus.indices] + 1)
+    scores = local_pct * global_rarity * 1000
+    return scores, local_pct
+
+# Scorers: each takes (corpus, global_counts) and returns one score per
+# corpus entry (aligned with corpus.indices); higher means more distinctive
+
+def score_prevalence(corpus, global_counts):
+    """Original heuristic: local % x global rarity x 1000"""
+    scores, _ = calculate_prevalence_scores(corpus, global_counts)
+    return scores
+
+def score_tfidf(corpus, global_counts):
+    """TF-IDF with countries as documents: local article share x smoothed log(N / countries using the term)"""
+    num_countries = len(corpus.countries)
+    country_df = np.bincount(corpus.indices, minlength=len(corpus.vocabulary))
+    idf = np.log((1 + num_countries) / (1 + country_df)) + 1
+    return (corpus.counts / corpus.num_articles[corpus.row_ids()]) * idf[corpus.indices]
+
+def score_log_odds(corpus, global_counts, prior_strength=None):
+    """
+    Log-odds ratio with an informative Dirichlet prior (Monroe, Colaresi &
+    Quinn 2008): country vs rest of the world, with the prior taken from the
+    global counts. Returns z-scores, so words backed by a handful of
+    articles no longer outrank well-supported ones.
+    """
+    prior_strength = prior_strength or LOG_ODDS_PRIOR_STRENGTH
+    total = global_counts.sum()
+    row_ids = corpus.row_ids()
+    country_totals = np.bincount(row_ids, weights=corpus.counts, minlength=len(corpus.countries))
     
-    # Use ThreadPoolExecutor for parallel requests (10 at a time)
-    with ThreadPoolExecutor(max_workers=10) as executor:
-        # Submit all tasks
-        future_to_country = {
-            executor.submit(fetch_news_for_country, country_name, country_code): (country_name, country_code)
-            for country_name, country_code in COUNTRIES.items()
-        }
-        
-        # Process results as they complete
-        for future in as_completed(future_to_country):
-            country_name, country_code = future_to_country[future]
-            completed += 1
-            
-            print(f"\n[{completed}/{total_countries}] ", end='')
-            
-            try:
-                articles = future.result()
-                if articles:
-                    all_country_data[country_name] = articles
-                    all_articles_text.extend([article['text'] for article in articles])
-                    country_timeframe[country_name] = '24h'
-                else:
-                    # No data - add to missing list for second pass
-                    missing_countries[country_name] = country_code
-            except Exception as e:
-                print(f"{country_name} -> Exception: {str(e)[:30]}")
-                missing_countries[country_name] = country_code
-    
-    # SECOND PASS: Try last 7 days for countries with no 24h data
-    still_missing = {}
-    if missing_countries:
-        print(f"\n\n{'='*80}")
-        print(f"SECOND PASS: Trying last 7 days for {len(missing_countries)} countries with no 24h data")
-        print(f"{'='*80}\n")
-        
-        completed_second = 0
-        total_missing = len(missing_countries)
-        
-        with ThreadPoolExecutor(max_workers=10) as executor:
-            # Submit all tasks with 7-day timespan
-            future_to_country = {
-                executor.submit(fetch_news_for_country, country_name, country_code, '7d'): (country_name, country_code)
-                for country_name, country_code in missing_countries.items()
-            }
-            
-            # Process results as they complete
-            for future in as_completed(future_to_country):
-                country_name, country_code = future_to_country[future]
-                completed_second += 1
-                
-                print(f"\n[{completed_second}/{total_missing}] ", end='')
-                
-                try:
-                    articles = future.result()
-                    if articles:
-                        all_country_data[country_name] = articles
-                        all_articles_text.extend([article['text'] for article in articles])
-                        country_timeframe[country_name] = '7d'
-                    else:
-                        # Still no data - add to third pass
-                        still_missing[country_name] = country_code
-                except Exception as e:
-                    print(f"{country_name} -> Exception: {str(e)[:30]}")
-                    still_missing[country_name] = country_code
-    
-    # THIRD PASS: Try last 30 days for countries still missing
-    if still_missing:
-        print(f"\n\n{'='*80}")
-        print(f"THIRD PASS: Trying last 30 days for {len(still_missing)} countries still missing")
-        print(f"{'='*80}\n")
-        
-        completed_third = 0
-        total_still_missing = len(still_missing)
-        
-        with ThreadPoolExecutor(max_workers=10) as executor:
-            # Submit all tasks with 30-day timespan
-            future_to_country = {
-                executor.submit(fetch_news_for_country, country_name, country_code, '30d'): country_name
-                for country_name, country_code in still_missing.items()
-            }
-            
-            # Process results as they complete
-            for future in as_completed(future_to_country):
-                country_name = future_to_country[future]
-                completed_third += 1
-                
-                print(f"\n[{completed_third}/{total_still_missing}] ", end='')
-                
-                try:
-                    articles = future.result()
-                    if articles:
-                        all_country_data[country_name] = articles
-                        all_articles_text.extend([article['text'] for article in articles])
-                        country_timeframe[country_name] = '30d'
-                except Exception as e:
-                    print(f"{country_name} -> Exception: {str(e)[:30]}")
+    alpha = prior_strength * global_counts[corpus.indices] / total
+    y_country = corpus.counts
+    y_rest = np.maximum(global_counts[corpus.indices] - y_country, 0)  # A rescaled baseline can undercut today
+    n_country = country_totals[row_ids]
+    n_rest = np.maximum(total - n_country, 0)
     
-    if not all_country_data:
-        print("\n[ERROR] No articles collected! Check your internet connection.")
-        sys.exit(1)
-    
-    print(f"\n{'='*80}")
-    print(f"COLLECTION SUMMARY")
-    print(f"{'='*80}")
-    print(f"Total articles collected: {len(all_articles_text)}")
-    print(f"Countries with data: {len(all_country_data)}")
-    print(f"Coverage: {len(all_country_data)}/{total_countries} ({100*len(all_country_data)/total_countries:.1f}%)")
-    print(f"Average articles per country: {len(all_articles_text) / len(all_country_data):.1f}")
+    with np.errstate(divide='ignore', invalid='ignore'):
+        delta = (np.log((y_country + alpha) / (n_country + prior_strength - y_country - alpha))
+                 - np.log((y_rest + alpha) / (n_rest + prior_strength - y_rest - alpha)))
+        variance = 1.0 / (y_country + alpha) + 1.0 / (y_rest + alpha)
+        z_scores = delta / np.sqrt(variance)
+    return np.nan_to_num(z_scores, nan=0.0, posinf=0.0, neginf=0.0)
+
+SCORERS = {
+    'prevalence': score_prevalence,
+    'tfidf': score_tfidf,
+    'log_odds': score_log_odds,
+}
+
+def baseline_global_counts(corpus, rolling_stats):
+    """
+    Global counts from the rolling window, aligned with corpus.vocabulary and
+    rescaled to this run's article count so score magnitudes stay comparable
+    """
+    counts = np.asarray(rolling_stats.global_counts(corpus.vocabulary), dtype=np.float64)
+    return counts * (corpus.num_articles.sum() / max(rolling_stats.total_articles(), 1))
+
+def top_k_entries(corpus, scores, row_idx, k=TOP_K_WORDS):
+    """
+    Positions (into corpus.indices) of one country's k best-scoring terms,
+    best first. Uses a partial partition instead of sorting the whole row;
+    ties keep first-seen order, matching a stable sort.
+    """
+    start, end = corpus.indptr[row_idx], corpus.indptr[row_idx + 1]
+    row_scores = scores[start:end]
+    if len(row_scores) > k:
+        kth_best = -np.partition(-row_scores, k - 1)[k - 1]
+        candidates = np.flatnonzero(row_scores >= kth_best)
+    else:
+        candidates = np.arange(len(row_scores))
+    best = candidates[np.argsort(-row_scores[candidates], kind='stable')][:k]
+    return start + best
+
+def group_headlines(articles, top_words, postings):
+    """
+    One country's unique headlines, those containing its top word first, plus
+    an inverted index {word: [headline ids]} for each of its top words (ids
+    index with_word + without_word). `postings` are the article positions of
+    each top word's headlines, from the corpus, so nothing is re-scanned.
+    """
+    # Exact duplicate headlines share one id
+    headline_ids = {}
+    article_headline = [headline_ids.setdefault(article['title'], len(headline_ids)) for article in articles]
+    headlines = list(headline_ids)
     
-    # Calculate recovery stats
-    first_pass_count = total_countries - len(missing_countries)
-    if missing_countries:
-        second_pass_recovered = len(missing_countries) - len(still_missing)
-        third_pass_recovered = len(still_missing) if still_missing else 0
-        final_missing = total_countries - len(all_country_data)
-        
-        print(f"\nData source breakdown:")
-        print(f"  24-hour data: {first_pass_count} countries")
-        if second_pass_recovered > 0:
-            print(f"  7-day fallback: +{second_pass_recovered} countries")
-        if still_missing and (len(still_missing) - final_missing) > 0:
-            print(f"  30-day fallback: +{len(still_missing) - final_missing} countries")
-        print(f"  No data found: {final_missing} countries")
+    with_ids = {article_headline[position] for position in postings[0]}
+    order = ([idx for idx in range(len(headlines)) if idx in with_ids] +
+             [idx for idx in range(len(headlines)) if idx not in with_ids])
+    new_id = {idx: rank for rank, idx in enumerate(order)}
     
-    print(f"{'='*80}\n")
+    return {
+        'with_word': [headlines[idx] for idx in order[:len(with_ids)]],
+        'without_word': [headlines[idx] for idx in order[len(with_ids):]],
+        'words': {
+            word: sorted({new_id[article_headline[position]] for position in positions})
+            for word, positions in zip(top_words, postings)
+        },
+    }
+
+def analyze_countries(all_country_data, country_timeframe, corpus, run_time=None, verbose=True, global_counts=None):
+    """
+    Score every country in `corpus` and pick its top words and headlines.
+    `global_counts` (aligned with corpus.vocabulary) defaults to the corpus's own.
+    Returns (result rows for the results store, {country_name: headlines}).
+    """
+    run_time = run_time or datetime.now()
+    if global_counts is None:
+        global_counts = corpus.global_counts()
+    if verbose:
+        print(f"  Found {len(corpus.vocabulary)} unique words globally\n")
     
-    # Calculate global word frequencies
-    print("Calculating global word frequencies...")
-    global_word_freq = get_word_frequency(all_articles_text)
-    print(f"  Found {len(global_word_freq)} unique words globally\n")
+    # Score every (country, word) pair at once, for each ranking method
+    rankings = {
+        method: SCORERS[method](corpus, global_counts)
+        for method in [SCORING_METHOD] + [m for m in EXTRA_SCORING_METHODS if m != SCORING_METHOD]
+    }
+    scores = rankings[SCORING_METHOD]
+    local_pcts = corpus.local_percentages()
     
     # Analyze each country and store headlines
-    print("Analyzing prevalent words per country...\n")
+    if verbose:
+        print("Analyzing prevalent words per country...\n")
     results = []
     headlines_data = {}  # Store headlines for each country
     
     total_to_analyze = len(all_country_data)
     for idx, (country_name, articles) in enumerate(all_country_data.items(), 1):
-        print(f"[{idx}/{total_to_analyze}] Analyzing {country_name}...")
+        if verbose:
+            print(f"[{idx}/{total_to_analyze}] Analyzing {country_name}...")
         
-        texts = [article['text'] for article in articles]
-        country_word_freq = get_word_frequency(texts)
+        top_entries = top_k_entries(corpus, scores, corpus.country_rows[country_name])
         
-        if not country_word_freq:
-            print(f"  [WARN] No words found\n")
+        if not len(top_entries):
+            if verbose:
+                print(f"  [WARN] No words found\n")
             continue
         
-        # Calculate prevalence scores for each word
-        word_scores = []
-        for word, country_count in country_word_freq.items():
-            global_count = global_word_freq.get(word, 0)
-            score, local_pct = calculate_prevalence_score(
-                word, country_count, global_count, len(articles)
-            )
-            word_scores.append((word, score, local_pct, country_count))
+        top_words = [corpus.vocabulary[term_id] for term_id in corpus.indices[top_entries]]
+        top_percentages = [round(float(pct), 2) for pct in local_pcts[top_entries]]
         
-        # Sort by score and get top word
-        word_scores.sort(key=lambda x: x[1], reverse=True)
-        
-        if word_scores:
-            prevalent_word, score, percentage, frequency = word_scores[0]
+        if top_words:
+            best = top_entries[0]
+            prevalent_word = top_words[0]
+            score, percentage, frequency = float(scores[best]), float(local_pcts[best]), int(corpus.counts[best])
             
             results.append({
                 'country_name': country_name,
-                'week': datetime.now().strftime('%Y-W%U'),
+                'week': run_time.strftime('%Y-W%U'),
                 'prevalent_word': prevalent_word,
                 'word_frequency': frequency,
                 'word_percentage': round(percentage, 2),
                 'prevalence_score': round(score, 2),
                 'num_articles': len(articles),
-                'timeframe': country_timeframe.get(country_name, '24h')
+                'timeframe': country_timeframe.get(country_name, '24h'),
+                'top_words': '|'.join(top_words),
+                'top_percentages': '|'.join(str(pct) for pct in top_percentages)
             })
             
-            # Store headlines: separate those with prevalent word from others
-            # Use sets to track seen headlines and remove duplicates
-            seen_headlines = set()
-            headlines_with_word = []
-            headlines_without_word = []
-            
-            # Use word boundary matching to avoid false positives
-            # e.g., "test" should not match "protesters"
-            word_pattern = r'\b' + re.escape(prevalent_word.lower()) + r'\b'
-            
-            for article in articles:
-                headline = article['title']
-                
-                # Skip if we've already seen this exact headline
-                if headline in seen_headlines:
+            # Alternative rankings side by side (same counts, no re-tokenizing)
+            for method, method_scores in rankings.items():
+                if method == SCORING_METHOD:
                     continue
-                seen_headlines.add(headline)
-                
-                # Check if prevalent word appears as a whole word in headline (case-insensitive)
-                if re.search(word_pattern, headline.lower()):
-                    headlines_with_word.append(headline)
-                else:
-                    headlines_without_word.append(headline)
+                method_entries = top_k_entries(corpus, method_scores, corpus.country_rows[country_name])
+                results[-1][f'{method}_top_words'] = '|'.join(
+                    corpus.vocabulary[term_id] for term_id in corpus.indices[method_entries])
+                results[-1][f'{method}_score'] = round(float(method_scores[method_entries[0]]), 4)
             
-            # Store all unique headlines (those with word on top, others below)
-            headlines_data[country_name] = {
-                'with_word': headlines_with_word,
-                'without_word': headlines_without_word
-            }
+            headlines_data[country_name] = group_headlines(
+                articles, top_words, corpus.headline_postings(corpus.country_rows[country_name],
+                                                              corpus.indices[top_entries]))
             
-            print(f" -> '{prevalent_word}' ({percentage:.1f}%)")
-        else:
-            print(f" -> No word found")
+            if verbose:
+                print(f" -> '{prevalent_word}' ({percentage:.1f}%)")
+    
+    return results, headlines_data
+
+def detect_emerging_words(corpus, results, detector, k=EMERGING_TOP_K):
+    """
+    Feed every country's counts to the spike detector and add its top `k`
+    emerging words to the result rows ('emerging_words', 'emerging_scores').
+    Returns the number of countries with emerging words.
+    """
+    rows = {row['country_name']: row for row in results}
+    found = 0
+    for row_idx, country_name in enumerate(corpus.countries):
+        term_ids, counts = corpus.row(row_idx)
+        term_counts = {corpus.vocabulary[term_id]: int(count) for term_id, count in zip(term_ids, counts)}
+        spikes = detector.update(country_name, term_counts, int(corpus.num_articles[row_idx]))[:k]
+        if spikes and country_name in rows:
+            rows[country_name]['emerging_words'] = '|'.join(word for word, _, _ in spikes)
+            rows[country_name]['emerging_scores'] = '|'.join(str(z_score) for _, z_score, _ in spikes)
+            found += 1
+    return found
+
+def save_results(results, headlines_data, run_time=None, verbose=True):
+    """
+    Store the results as run_time's daily snapshot in RESULTS_DB and write the headline shards.
+    Returns the results as a DataFrame sorted by score, or None if there are none.
+    """
+    run_time = run_time or datetime.now()
     
     # Create DataFrame and save
+    import pandas as pd
     df = pd.DataFrame(results)
     
     if len(df) == 0:
-        print("\n[ERROR] No results to save!")
-        sys.exit(1)
+        return None
     
     # Sort by prevalence score
     df = df.sort_values('prevalence_score', ascending=False)
     
-    print("\n" + "="*80)
-    print("PREVALENT WORD ANALYSIS RESULTS")
+    if verbose:
+        print("\n" + "="*80)
+        print("PREVALENT WORD ANALYSIS RESULTS")
+        print("="*80)
+        print(df[['country_name', 'prevalent_word', 'word_percentage', 'prevalence_score', 'num_articles']].to_string(index=False))
+        print("="*80)
+    
+    # Save to the results store
+    ResultsStore(RESULTS_DB).append(run_time, df.to_dict('records'))
+    print(f"\n[OK] Results saved to: {RESULTS_DB} ({run_time.strftime('%Y-%m-%d')})")
+    
+    # Save headlines as per-country shards the site fetches on demand
+    written = write_headline_shards(headlines_data, HEADLINES_DIR, COUNTRIES)
+    print(f"[OK] Headlines saved to: {HEADLINES_DIR}/ ({written} files updated)")
+    
+    return df
+
+def main():
+    run_time = datetime.now()
     print("="*80)
-    print(df[['country_name', 'prevalent_word', 'word_percentage', 'prevalence_score', 'num_articles']].to_string(index=False))
+    print("WORLD'S MOOD - NEWS ANALYSIS (GDELT Project)")
     print("="*80)
+    print(f"\nStarted at: {run_time.strftime('%Y-%m-%d %H:%M:%S')}")
+    print(f"Countries to analyze: {len(COUNTRIES)}")
+    print(f"Max articles per country: {MAX_ARTICLES_PER_COUNTRY}")
+    print(f"Timeframes: {' -> '.join(TIMESPAN_ESCALATION)} (per-country fallback)")
+    if DEEP_COLLECTION:
+        print(f"Deep collection: up to {DEEP_WINDOWS} sub-windows x {DEEP_MAX_RECORDS} articles, "
+              f"stops at <{DEEP_SATURATION:.0%} new words")
+    print(f"Fetch engine: {'asyncio (aiohttp)' if USE_ASYNC_FETCH and USE_AIOHTTP else 'thread pool'}, "
+          f"{FETCH_CONCURRENCY} concurrent requests, {FETCH_TIMEOUT}s timeout")
+    print(f"Stop words: {'NLTK corpus' if USE_NLTK else 'bundled pack'}")
+    print(f"Scoring: {SCORING_METHOD}"
+          f"{' (also ' + ', '.join(EXTRA_SCORING_METHODS) + ')' if EXTRA_SCORING_METHODS else ''}")
+    print(f"Rate limit: {GDELT_RATE_LIMIT:g} req/s (adaptive), {FETCH_RETRIES} retries on 429/5xx/timeouts")
+    print(f"Response cache: {'ENABLED (' + CACHE_DIR + ')' if RESPONSE_CACHE else 'BYPASSED'}")
+    print(f"Analysis: {f'{ANALYSIS_WORKERS} worker processes' if ANALYSIS_WORKERS > 0 else 'main process'}")
+    if NEWS_BLACKLIST['headline_sources']:
+        print(f"Headline filtering: ENABLED ({len(NEWS_BLACKLIST['headline_sources'])} sources blacklisted)")
+    else:
+        print(f"Headline filtering: DISABLED")
+    if NEWS_BLACKLIST['source_words']:
+        print(f"Word filtering: ENABLED ({len(NEWS_BLACKLIST['source_words'])} news source words blacklisted)")
+    else:
+        print(f"Word filtering: DISABLED")
+    print("\n" + "="*80 + "\n")
+    
+    total_countries = len(COUNTRIES)
     
-    # Save to CSV
-    output_file = f'prevalent_words_gdelt_{datetime.now().strftime("%Y%m%d")}.csv'
-    df.to_csv(output_file, index=False)
-    print(f"\n[OK] Results saved to: {output_file}")
-    
-    # Save headlines to JSON
-    import json
-    headlines_file = 'headlines_data.json'
-    with open(headlines_file, 'w', encoding='utf-8') as f:
-        json.dump(headlines_data, f, indent=2, ensure_ascii=False)
-    print(f"[OK] Headlines saved to: {headlines_file}")
+    print(f"COLLECTING: {' -> '.join(TIMESPAN_ESCALATION)} per country\n")
+    
+    # Each country is tokenized as soon as its fetch lands. Workers are
+    # spawned, not forked: a fork taken while fetch threads hold locks can deadlock
+    analysis_pool = None
+    if ANALYSIS_WORKERS > 0:
+        analysis_pool = ProcessPoolExecutor(max_workers=ANALYSIS_WORKERS,
+                                            mp_context=multiprocessing.get_context('spawn'))
+    corpus_builder = CorpusBuilder(analysis_pool)
+    analyzed_articles = {}
+    
+    def add_country_result(country_name, articles, timespan, headline_splits=None):
+        # Syndicated copies count once: collapse them before counting (a copy
+        # of the list, so the archive keeps every article as fetched)
+        if DEDUPE_NEAR_DUPLICATES:
+            articles = collapse_near_duplicates(articles)
+        analyzed_articles[country_name] = articles
+        corpus_builder.add_country(country_name, articles, timespan, headline_splits)
+    
+    all_country_data, country_timeframe, failed_countries = collect_news(COUNTRIES, on_result=add_country_result)
+    analyzed_articles = {country_name: analyzed_articles[country_name] for country_name in all_country_data}
+    total_articles = sum(len(articles) for articles in all_country_data.values())
+    
+    if not all_country_data:
+        print("\n[ERROR] No articles collected! Check your internet connection.")
+        sys.exit(1)
+    
+    print(f"\n{'='*80}")
+    print(f"COLLECTION SUMMARY")
+    print(f"{'='*80}")
+    print(f"Total articles collected: {total_articles}")
+    print(f"Countries with data: {len(all_country_data)}")
+    print(f"Coverage: {len(all_country_data)}/{total_countries} ({100*len(all_country_data)/total_countries:.1f}%)")
+    print(f"Average articles per country: {total_articles / len(all_country_data):.1f}")
+    
+    # Calculate recovery stats
+    timeframe_counts = Counter(country_timeframe.values())
+    if len(timeframe_counts) > 1 or len(all_country_data) < total_countries:
+        print(f"\nData source breakdown:")
+        print(f"  {TIMESPAN_ESCALATION[0]} data: {timeframe_counts[TIMESPAN_ESCALATION[0]]} countries")
+        for timespan in TIMESPAN_ESCALATION[1:]:
+            if timeframe_counts[timespan] > 0:
+                print(f"  {timespan} fallback: +{timeframe_counts[timespan]} countries")
+        if failed_countries:
+            print(f"  Failed after retries: {len(failed_countries)} countries")
+        print(f"  No data found: {total_countries - len(all_country_data) - len(failed_countries)} countries")
+    
+    print(f"{'='*80}\n")
+    
+    if USE_ARTICLE_ARCHIVE:
+        archive = ArticleArchive(ARCHIVE_DIR)
+        archive_file = archive.write_run(all_country_data, country_timeframe, run_time)
+        expired = archive.prune(ARCHIVE_RETENTION_DAYS, run_time)
+        print(f"Articles archived to: {archive_file}"
+              f"{f' ({len(expired)} expired days removed)' if expired else ''}\n")
+    
+    # Headlines were tokenized during collection
+    corpus = corpus_builder.build()
+    if analysis_pool:
+        analysis_pool.shutdown()
+    
+    # Fold this run's new headlines into the rolling window (reusing their corpus tokens)
+    rolling_stats = None
+    if USE_ROLLING_STATS:
+        rolling_stats = RollingWordStats(ROLLING_STATE_DIR, ROLLING_WINDOW_DAYS,
+                                         sketch_width=SKETCH_WIDTH if USE_SKETCH_COUNTS else 0,
+                                         sketch_depth=SKETCH_DEPTH, heavy_hitters=HEAVY_HITTERS_K)
+        new_articles = rolling_stats.add_run(analyzed_articles, corpus.headline_words, run_time)
+        rolling_stats.save()
+        print(f"Rolling stats: {new_articles} new articles, "
+              f"{rolling_stats.total_articles()} in the last {ROLLING_WINDOW_DAYS} days")
+        top_terms = ', '.join(f"{word} ({count})" for word, count in rolling_stats.top_terms(5))
+        print(f"  Top words over the window: {top_terms}\n")
+    
+    # Global counts are column sums of the matrix
+    print("Calculating global word frequencies...")
+    global_counts = None
+    if USE_ROLLING_BASELINE and rolling_stats:
+        print(f"  Scoring against the {ROLLING_WINDOW_DAYS}-day baseline")
+        global_counts = baseline_global_counts(corpus, rolling_stats)
+    elif DEDUPE_NEAR_DUPLICATES:
+        duplicate_counts, copies = cross_country_duplicate_counts(corpus, analyzed_articles)
+        global_counts = corpus.global_counts() - duplicate_counts
+        print(f"  {copies} headlines are copies of stories from other countries (counted once)")
+    
+    results, headlines_data = analyze_countries(analyzed_articles, country_timeframe, corpus, run_time,
+                                                global_counts=global_counts)
+    if USE_TREND_DETECTION:
+        detector = SpikeDetector(TREND_STATE_FILE)
+        emerging = detect_emerging_words(corpus, results, detector)
+        detector.save()
+        print(f"Trend detection: emerging words in {emerging} countries")
+    
+    df = save_results(results, headlines_data, run_time)
+    if df is None:
+        print("\n[ERROR] No results to save!")
+        sys.exit(1)
     
     # Summary
     print("\nSummary:")